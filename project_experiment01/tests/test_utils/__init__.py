@@ -0,0 +1 @@
+# 工具模組測試包初始化檔案
@@ -0,0 +1,208 @@
+"""
+報告生成模組測試
+"""
+import json
+import os
+
+import pytest
+import matplotlib.pyplot as plt
+
+import utils.report_generator as report_generator
+from utils.report_generator import ReportGenerator
+
+
+@pytest.fixture
+def figure():
+    """簡單的matplotlib圖形"""
+    fig, ax = plt.subplots(figsize=(2, 2))
+    ax.plot([0, 1], [0, 1])
+    yield fig
+    plt.close(fig)
+
+
+@pytest.fixture
+def generator(tmp_path):
+    """在臨時目錄中建立報告生成器"""
+    generator = ReportGenerator(reports_dir=str(tmp_path / "reports"), experiment_name="exp")
+    generator.add_section("結果")
+    return generator
+
+
+class TestInMemoryFigures:
+    """不寫入磁盤的圖片測試類"""
+
+    def test_figure_not_written(self, generator, figure):
+        """測試persist_to_disk=False時不寫入images目錄，內容中只保留佔位引用"""
+        generator.add_figure(fig=figure, caption="圖一", persist_to_disk=False)
+
+        section = generator.report_data["sections"][-1]
+        assert os.listdir(generator.images_dir) == []
+        assert section["figures"][0]["path"] is None
+        assert "data:image" not in section["content"]
+
+    def test_json_excludes_image_data(self, generator, figure, tmp_path):
+        """測試JSON中不包含圖片數據"""
+        generator.add_figure(fig=figure, caption="圖一", persist_to_disk=False)
+
+        path = generator.save_report_data(str(tmp_path / "data.json"))
+
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        assert "data:image" not in text
+        json.loads(text)
+
+    def test_html_embeds_once(self, generator, figure, tmp_path):
+        """測試HTML中圖片只內嵌一次"""
+        generator.add_figure(fig=figure, caption="圖一", persist_to_disk=False)
+
+        path = generator.generate_html(str(tmp_path / "report.html"))
+
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        assert html.count("data:image/png;base64,") == 1
+        assert "inline-figure:" not in html
+
+    def test_markdown_embeds_data_uri(self, generator, figure, tmp_path):
+        """測試Markdown中佔位引用替換為data URI"""
+        generator.add_figure(fig=figure, caption="圖一", persist_to_disk=False)
+        base64_data = generator.report_data["sections"][-1]["figures"][0]["base64"]
+
+        path = generator.generate_markdown(str(tmp_path / "report.md"))
+
+        with open(path, encoding="utf-8") as f:
+            md = f.read()
+        assert f"(data:image/png;base64,{base64_data})" in md
+        assert "inline-figure:" not in md
+
+    def test_same_basename_from_different_directories(self, generator, tmp_path):
+        """測試不同目錄中同名的圖片文件各自內嵌，不會互相覆蓋"""
+        for name, color in (("a", "red"), ("b", "blue")):
+            os.makedirs(tmp_path / name)
+            fig, ax = plt.subplots(figsize=(1, 1))
+            ax.set_facecolor(color)
+            fig.savefig(tmp_path / name / "plot.png")
+            plt.close(fig)
+            generator.add_figure(image_path=str(tmp_path / name / "plot.png"), caption=name, persist_to_disk=False)
+        figures = generator.report_data["sections"][-1]["figures"]
+
+        path = generator.generate_markdown(str(tmp_path / "report.md"))
+
+        with open(path, encoding="utf-8") as f:
+            md = f.read()
+        assert figures[0]["base64"] != figures[1]["base64"]
+        for figure in figures:
+            assert f"(data:image/png;base64,{figure['base64']})" in md
+
+    def test_parenthesis_in_filename_and_caption(self, generator, tmp_path):
+        """測試文件名和標題中含有括號時佔位引用仍能正確替換和去掉"""
+        image_path = tmp_path / "plot (1).png"
+        fig, ax = plt.subplots(figsize=(1, 1))
+        fig.savefig(image_path)
+        plt.close(fig)
+        generator.add_figure(image_path=str(image_path), caption="圖 [a] (b)", persist_to_disk=False)
+        base64_data = generator.report_data["sections"][-1]["figures"][0]["base64"]
+
+        md_path = generator.generate_markdown(str(tmp_path / "report.md"))
+        html_path = generator.generate_html(str(tmp_path / "report.html"))
+
+        with open(md_path, encoding="utf-8") as f:
+            md = f.read()
+        with open(html_path, encoding="utf-8") as f:
+            html = f.read()
+        assert f"(data:image/png;base64,{base64_data})" in md
+        assert "inline-figure:" not in md
+        assert html.count("data:image/png;base64,") == 1
+        assert "inline-figure:" not in html
+
+    def test_custom_template_markdown_filter(self, generator, figure, tmp_path):
+        """測試自定義模板以markdown過濾器渲染章節內容時不留下失效的佔位圖片"""
+        generator.add_figure(fig=figure, caption="圖一", persist_to_disk=False)
+        template = "{% for section in sections %}{{ section.content|markdown }}{% endfor %}"
+
+        path = generator.generate_html(str(tmp_path / "custom.html"), template=template)
+
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        assert "inline-figure:" not in html
+        assert "<strong>圖一</strong>" in html
+
+
+class TestEmbedImages:
+    """HTML圖片內嵌選項測試類"""
+
+    def test_default_references_image_files(self, generator, figure, tmp_path):
+        """測試默認引用images目錄中的圖片文件"""
+        generator.add_figure(fig=figure, caption="圖一")
+
+        path = generator.generate_html(str(generator.experiment_report_dir / "report.html"))
+
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        assert os.listdir(generator.images_dir) == ["exp_0.png"]
+        assert 'src="images/exp_0.png"' in html
+        assert "data:image" not in html
+
+    def test_embed_images(self, generator, figure, tmp_path):
+        """測試embed_images=True時內嵌已寫入磁盤的圖片"""
+        generator.add_figure(fig=figure, caption="圖一")
+        generator.add_figure(fig=figure, caption="圖二", persist_to_disk=False)
+
+        path = generator.generate_html(str(tmp_path / "report.html"), embed_images=True)
+
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        assert html.count("data:image/png;base64,") == 2
+
+
+class TestSectionCache:
+    """章節HTML緩存測試類"""
+
+    def test_direct_content_edit_not_stale(self, generator, tmp_path):
+        """測試直接修改章節內容後重新生成的報告反映新內容"""
+        generator.add_paragraph("舊內容")
+        generator.generate_html(str(tmp_path / "a.html"))
+
+        generator.report_data["sections"][-1]["content"] = "新內容"
+        html_path = generator.generate_html(str(tmp_path / "b.html"))
+        md_path = generator.generate_markdown(str(tmp_path / "b.md"))
+
+        for path in (html_path, md_path):
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            assert "新內容" in text
+            assert "舊內容" not in text
+
+
+class TestCustomTemplate:
+    """自定義HTML模板測試類"""
+
+    def test_whitespace_matches_plain_template(self, generator, tmp_path):
+        """測試自定義模板的空白處理與jinja2.Template一致"""
+        from jinja2 import Template
+        template = "<ul>\n  {% for section in sections %}\n  <li>{{ section.title }}</li>\n  {% endfor %}\n</ul>\n"
+
+        path = generator.generate_html(str(tmp_path / "custom.html"), template=template)
+
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        assert html == Template(template).render(**generator.report_data)
+
+    def test_markdown_filter_available(self, generator, tmp_path):
+        """測試自定義模板可以使用markdown過濾器"""
+        generator.add_paragraph("**粗體**")
+        template = "{% for section in sections %}{{ section.content|markdown }}{% endfor %}"
+
+        path = generator.generate_html(str(tmp_path / "custom.html"), template=template)
+
+        with open(path, encoding="utf-8") as f:
+            assert "<strong>粗體</strong>" in f.read()
+
+    def test_compiled_templates_bounded(self, generator, tmp_path):
+        """測試已編譯的自定義模板數量有上限，而且不寫入共用的模板載入器"""
+        default_templates = dict(report_generator._get_env().loader.mapping)
+
+        for i in range(report_generator._CUSTOM_TEMPLATE_CACHE_SIZE + 5):
+            generator.generate_html(str(tmp_path / "custom.html"), template=f"{{{{ title }}}} {i}")
+
+        assert len(report_generator._custom_templates) == report_generator._CUSTOM_TEMPLATE_CACHE_SIZE
+        assert report_generator._get_env().loader.mapping == default_templates
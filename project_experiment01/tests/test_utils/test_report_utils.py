@@ -0,0 +1,355 @@
+"""
+實驗報告工具模組測試（WeasyPrint以假模組代替，不進行真正的PDF排版）
+"""
+import hashlib
+import importlib
+import sys
+import types
+from datetime import datetime, timedelta
+
+import pytest
+
+
+class FakeHTML:
+    """記錄write_pdf調用的WeasyPrint HTML替身"""
+
+    calls = []
+
+    def __init__(self, string=None, **kwargs):
+        self.string = string
+
+    def write_pdf(self, target, **kwargs):
+        FakeHTML.calls.append((str(target), kwargs))
+        with open(target, "wb") as f:
+            f.write(b"%PDF-fake")
+
+
+class FakeCSS:
+    """記錄解析次數的WeasyPrint CSS替身"""
+
+    instances = 0
+
+    def __init__(self, string=None, **kwargs):
+        FakeCSS.instances += 1
+        self.string = string
+
+
+class FakeFontConfiguration:
+    """WeasyPrint FontConfiguration替身"""
+
+
+class FakeExecutor:
+    """同步執行任務並記錄提交內容的ProcessPoolExecutor替身"""
+
+    instances = []
+
+    def __init__(self, max_workers=None, initializer=None):
+        self.max_workers = max_workers
+        self.initializer = initializer
+        self.submitted = []
+        FakeExecutor.instances.append(self)
+        if initializer is not None:
+            initializer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+        self.submitted.append((fn, args))
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class FakeClock:
+    """可控制的datetime替身，now()返回固定時間，tick()使時間前進"""
+
+    def __init__(self):
+        self.current = datetime(2026, 1, 1, 12, 0, 0)
+
+    def now(self):
+        return self.current
+
+    def tick(self, seconds=1):
+        self.current += timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def report_utils(monkeypatch):
+    """以假WeasyPrint模組導入utils.report_utils"""
+    weasyprint = types.ModuleType("weasyprint")
+    weasyprint.HTML = FakeHTML
+    weasyprint.CSS = FakeCSS
+    text = types.ModuleType("weasyprint.text")
+    fonts = types.ModuleType("weasyprint.text.fonts")
+    fonts.FontConfiguration = FakeFontConfiguration
+    weasyprint.text = text
+    text.fonts = fonts
+    monkeypatch.setitem(sys.modules, "weasyprint", weasyprint)
+    monkeypatch.setitem(sys.modules, "weasyprint.text", text)
+    monkeypatch.setitem(sys.modules, "weasyprint.text.fonts", fonts)
+    monkeypatch.delitem(sys.modules, "utils.report_utils", raising=False)
+
+    FakeHTML.calls = []
+    FakeCSS.instances = 0
+    FakeExecutor.instances = []
+
+    module = importlib.import_module("utils.report_utils")
+    yield module
+    sys.modules.pop("utils.report_utils", None)
+
+
+@pytest.fixture
+def results_data():
+    """兩個堆疊的實驗結果"""
+    return {
+        "summary": {"total_execution_time": "1s", "total_files_processed": 3},
+        "stacks": {
+            "s1": {
+                "description": "d1",
+                "components": {"vad": {"name": "webrtc"}, "feature": {"name": "mfcc"}},
+                "metrics": {"r2_score": 0.5, "mae": 0.3}
+            },
+            "s2": {
+                "description": "d2",
+                "components": {"vad": {"name": "silero"}},
+                "metrics": {"r2_score": 0.7, "mae": 0.2}
+            }
+        }
+    }
+
+
+@pytest.fixture
+def config():
+    """實驗配置"""
+    return {
+        "global_params": {"data_path": "data", "sampling_rate": 16000},
+        "stacks": {"s1": {"description": "d1", "vad_method": {"name": "webrtc", "params": {"mode": 2}}}}
+    }
+
+
+@pytest.fixture
+def clock(report_utils, monkeypatch):
+    """固定報告生成時間"""
+    fake_clock = FakeClock()
+    monkeypatch.setattr(report_utils, "datetime", fake_clock)
+    return fake_clock
+
+
+def make_generator(report_utils, tmp_path, **kwargs):
+    """在臨時目錄中建立報告生成器"""
+    return report_utils.ReportGenerator(
+        report_dir=str(tmp_path / "reports"), template_dir=str(tmp_path / "templates"), **kwargs
+    )
+
+
+class TestGenerateBatch:
+    """批量報告生成測試類"""
+
+    def test_pdf_jobs_dispatched_to_process_pool(self, report_utils, tmp_path, results_data, config, monkeypatch):
+        """測試每份報告的PDF轉換都提交到進程池"""
+        monkeypatch.setattr(report_utils, "ProcessPoolExecutor", FakeExecutor)
+        generator = make_generator(report_utils, tmp_path)
+
+        paths = generator.generate_batch([
+            {"experiment_name": "e1", "results_data": results_data, "config": config},
+            {"experiment_name": "e2", "results_data": results_data, "config": config,
+             "plots_data": {"s1": {"description": "p", "path": "p.png"}}},
+        ], max_workers=8)
+
+        assert [sorted(p) for p in paths] == [["summary"], ["detailed", "summary"]]
+        assert len(FakeExecutor.instances) == 1
+        pool = FakeExecutor.instances[0]
+        assert pool.max_workers == 3  # 不超過PDF任務數
+        assert len(pool.submitted) == 3
+        assert all(fn is report_utils._convert_md_to_pdf_worker for fn, _ in pool.submitted)
+        # 工作進程不沿用主進程的轉換器，自行重新建立
+        assert pool.initializer is report_utils._init_pdf_worker
+        assert FakeCSS.instances == 2
+
+        pdf_paths = sorted(args[1] for _, args in pool.submitted)
+        assert pdf_paths == sorted(target for target, _ in FakeHTML.calls)
+        assert sorted(p.name for p in generator.pdf_dir.glob("*.pdf")) == sorted(
+            p.rsplit("/", 1)[-1] for p in pdf_paths
+        )
+
+    def test_single_worker_converts_in_process(self, report_utils, tmp_path, results_data, config, monkeypatch):
+        """測試只有一個並行進程時不建立進程池"""
+        monkeypatch.setattr(report_utils, "ProcessPoolExecutor", FakeExecutor)
+        generator = make_generator(report_utils, tmp_path)
+
+        generator.generate_batch(
+            [{"experiment_name": "e1", "results_data": results_data, "config": config}], max_workers=4
+        )
+
+        assert FakeExecutor.instances == []
+        assert len(FakeHTML.calls) == 1
+
+    def test_duplicate_names_rejected(self, report_utils, tmp_path, results_data, config, monkeypatch):
+        """測試實驗名稱重複時拒絕生成，避免報告互相覆蓋"""
+        monkeypatch.setattr(report_utils, "ProcessPoolExecutor", FakeExecutor)
+        generator = make_generator(report_utils, tmp_path)
+
+        with pytest.raises(ValueError, match="e1"):
+            generator.generate_batch([
+                {"experiment_name": "e1", "results_data": results_data, "config": config},
+                {"experiment_name": "e1", "results_data": results_data, "config": {}},
+            ])
+
+        assert list(generator.md_dir.glob("*.md")) == []
+        assert FakeHTML.calls == []
+
+    def test_empty_batch(self, report_utils, tmp_path, monkeypatch):
+        """測試空列表不產生任何報告"""
+        monkeypatch.setattr(report_utils, "ProcessPoolExecutor", FakeExecutor)
+        generator = make_generator(report_utils, tmp_path)
+
+        assert generator.generate_batch([]) == []
+        assert FakeHTML.calls == []
+
+
+class TestReportFiles:
+    """報告文件寫入測試類"""
+
+    def test_markdown_only(self, report_utils, tmp_path, results_data, config, clock):
+        """測試pdf=False時只以流式方式寫入Markdown，內容與生成PDF時相同"""
+        generator = make_generator(report_utils, tmp_path)
+
+        streamed = generator.generate_summary_report("e1", results_data, config, pdf=False)
+        rendered = generator.generate_summary_report("e2", results_data, config)
+
+        assert len(FakeHTML.calls) == 1
+        with open(streamed, encoding="utf-8") as f:
+            streamed_text = f.read()
+        with open(rendered, encoding="utf-8") as f:
+            rendered_text = f.read()
+        assert streamed_text.replace("e1", "e2") == rendered_text
+
+
+class TestPdfCache:
+    """PDF摘要緩存測試類"""
+
+    def test_cache_disabled_by_default(self, report_utils, tmp_path, results_data, config, clock):
+        """測試默認每次都轉換且不寫入摘要文件"""
+        generator = make_generator(report_utils, tmp_path)
+
+        generator.generate_summary_report("e1", results_data, config)
+        clock.tick()
+        generator.generate_summary_report("e1", results_data, config)
+
+        assert len(FakeHTML.calls) == 2
+        assert list(generator.pdf_dir.glob("*.sha")) == []
+
+    def test_unchanged_rerun_copies_pdf(self, report_utils, tmp_path, results_data, config, clock):
+        """測試重新生成內容未變更的報告時複製上次的PDF，不重新轉換"""
+        generator = make_generator(report_utils, tmp_path, cache_pdf=True)
+
+        generator.generate_summary_report("e1", results_data, config)
+        clock.tick(60)
+        generator.generate_summary_report("e1", results_data, config)
+
+        assert len(FakeHTML.calls) == 1
+        pdfs = sorted(generator.pdf_dir.glob("*.pdf"))
+        assert len(pdfs) == 2
+        assert pdfs[0].read_bytes() == pdfs[1].read_bytes()
+        assert (generator.pdf_dir / "e1_summary.sha").exists()
+
+    def test_unchanged_detailed_rerun_copies_pdf(self, report_utils, tmp_path, results_data, config, clock):
+        """測試詳細報告（含帶時間戳的原始數據文件名）重新生成時同樣命中緩存"""
+        generator = make_generator(report_utils, tmp_path, cache_pdf=True)
+        plots_data = {"s1": {"description": "p", "path": "p.png"}}
+
+        generator.generate_detailed_report("e1", results_data, config, plots_data)
+        clock.tick()
+        generator.generate_detailed_report("e1", results_data, config, plots_data)
+
+        assert len(FakeHTML.calls) == 1
+        assert len(list(generator.pdf_dir.glob("*.pdf"))) == 2
+
+    def test_changed_results_reconverted(self, report_utils, tmp_path, results_data, config, clock):
+        """測試結果變更時重新轉換"""
+        generator = make_generator(report_utils, tmp_path, cache_pdf=True)
+
+        generator.generate_summary_report("e1", results_data, config)
+        clock.tick()
+        results_data["stacks"]["s1"]["metrics"]["r2_score"] = 0.9
+        generator.generate_summary_report("e1", results_data, config)
+
+        assert len(FakeHTML.calls) == 2
+
+    def test_experiments_cached_separately(self, report_utils, tmp_path, results_data, config, clock):
+        """測試不同實驗名稱使用各自的緩存條目"""
+        generator = make_generator(report_utils, tmp_path, cache_pdf=True)
+
+        generator.generate_summary_report("e1", results_data, config)
+        generator.generate_summary_report("e2", results_data, config)
+
+        assert len(FakeHTML.calls) == 2
+
+    def test_missing_pdf_regenerated(self, report_utils, tmp_path, results_data, config, clock):
+        """測試上次的PDF被刪除後重新轉換"""
+        generator = make_generator(report_utils, tmp_path, cache_pdf=True)
+
+        generator.generate_summary_report("e1", results_data, config)
+        for pdf in generator.pdf_dir.glob("*.pdf"):
+            pdf.unlink()
+        clock.tick()
+        generator.generate_summary_report("e1", results_data, config)
+
+        assert len(FakeHTML.calls) == 2
+
+    def test_stylesheet_change_invalidates_cache(self, report_utils, tmp_path, results_data, config, clock,
+                                                 monkeypatch):
+        """測試樣式表變更後相同內容也重新轉換"""
+        generator = make_generator(report_utils, tmp_path, cache_pdf=True)
+
+        generator.generate_summary_report("e1", results_data, config)
+        monkeypatch.setattr(
+            report_utils, "_PDF_DIGEST_BASE", hashlib.blake2b(b"body { color: red; }", digest_size=16)
+        )
+        clock.tick()
+        generator.generate_summary_report("e1", results_data, config)
+
+        assert len(FakeHTML.calls) == 2
+
+    def test_batch_rerun_uses_cache(self, report_utils, tmp_path, results_data, config, clock, monkeypatch):
+        """測試批量生成時工作進程同樣複製未變更報告的PDF"""
+        monkeypatch.setattr(report_utils, "ProcessPoolExecutor", FakeExecutor)
+        generator = make_generator(report_utils, tmp_path, cache_pdf=True)
+        experiments = [
+            {"experiment_name": "e1", "results_data": results_data, "config": config},
+            {"experiment_name": "e2", "results_data": results_data, "config": config},
+        ]
+
+        generator.generate_batch(experiments)
+        clock.tick()
+        generator.generate_batch(experiments)
+
+        assert len(FakeHTML.calls) == 2
+        assert len(list(generator.pdf_dir.glob("*.pdf"))) == 4
+
+
+class TestPdfConverter:
+    """PDF轉換器共用測試類"""
+
+    def test_converter_shared_across_instances(self, report_utils, tmp_path):
+        """測試同一進程內的多個實例只解析一次樣式表"""
+        first = make_generator(report_utils, tmp_path)
+        second = make_generator(report_utils, tmp_path)
+
+        assert FakeCSS.instances == 1
+        assert first._report_css is second._report_css
+
+    def test_stylesheet_passed_to_weasyprint(self, report_utils, tmp_path):
+        """測試轉換時傳入預先解析的樣式表和字體配置"""
+        generator = make_generator(report_utils, tmp_path)
+
+        generator._convert_md_to_pdf("# 標題", str(generator.pdf_dir / "r.pdf"))
+
+        _, kwargs = FakeHTML.calls[0]
+        assert kwargs["stylesheets"] == [generator._report_css]
+        assert kwargs["font_config"] is generator._font_config
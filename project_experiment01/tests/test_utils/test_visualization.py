@@ -0,0 +1,150 @@
+"""
+可視化模組測試
+"""
+import os
+import warnings
+
+import numpy as np
+import pytest
+import matplotlib.pyplot as plt
+from unittest.mock import patch
+
+from utils.visualization import PlotResults
+
+
+@pytest.fixture
+def scores():
+    """系統分數與參考分數"""
+    rng = np.random.RandomState(42)
+    system_scores = rng.rand(50) * 5
+    azure_scores = system_scores + rng.randn(50) * 0.5
+    return system_scores, azure_scores
+
+
+@pytest.fixture
+def plotter():
+    """繪圖器實例"""
+    return PlotResults()
+
+
+class TestPlotGating:
+    """SKIP_PLOT_*開關測試類"""
+
+    def test_skip_returns_none(self, plotter, scores, tmp_path, monkeypatch):
+        """測試設置SKIP_PLOT_SCATTER時跳過繪圖並返回None"""
+        monkeypatch.setenv("SKIP_PLOT_SCATTER", "1")
+        output_path = str(tmp_path / "scatter.png")
+
+        assert plotter.plot_scatter(*scores, output_path) is None
+        assert not os.path.exists(output_path)
+
+    @pytest.mark.parametrize("value", [None, "", "0"])
+    def test_not_skipped(self, plotter, scores, tmp_path, monkeypatch, value):
+        """測試未設置、空值或"0"時正常繪圖"""
+        if value is None:
+            monkeypatch.delenv("SKIP_PLOT_SCATTER", raising=False)
+        else:
+            monkeypatch.setenv("SKIP_PLOT_SCATTER", value)
+        output_path = str(tmp_path / "scatter.png")
+
+        assert plotter.plot_scatter(*scores, output_path) == output_path
+        assert os.path.getsize(output_path) > 0
+
+    def test_other_plots_unaffected(self, plotter, scores, tmp_path, monkeypatch):
+        """測試開關只影響對應的圖形類型"""
+        monkeypatch.setenv("SKIP_PLOT_SCATTER", "1")
+        monkeypatch.delenv("SKIP_PLOT_RESIDUALS", raising=False)
+
+        assert plotter.plot_scatter(*scores, str(tmp_path / "scatter.png")) is None
+        assert plotter.plot_residuals(*scores, str(tmp_path / "residuals.png")) is not None
+
+    def test_skipped_correlation_matrix_keeps_shape(self, plotter, tmp_path, monkeypatch):
+        """測試跳過相關矩陣圖時返回與正常情況相同結構的 (None, None)"""
+        monkeypatch.setenv("SKIP_PLOT_CORRELATION", "1")
+        rng = np.random.RandomState(0)
+
+        matrix_path, target_path = plotter.plot_correlation_matrix(
+            rng.randn(20, 3), rng.randn(20), ["a", "b", "c"], str(tmp_path / "corr.png")
+        )
+
+        assert (matrix_path, target_path) == (None, None)
+        assert os.listdir(tmp_path) == []
+
+    def test_skip_keeps_metadata(self):
+        """測試裝飾後保留原方法的名稱和文檔"""
+        assert PlotResults.plot_scatter.__name__ == "plot_scatter"
+        assert "散點圖" in PlotResults.plot_scatter.__doc__
+
+
+class TestScorePlots:
+    """分數圖測試類"""
+
+    @pytest.mark.parametrize("method", ["plot_scatter", "plot_residuals", "plot_bland_altman"])
+    def test_accepts_lists(self, plotter, scores, tmp_path, monkeypatch, method):
+        """測試分數可以是普通列表"""
+        monkeypatch.delenv(f"SKIP_PLOT_{method[5:].upper()}", raising=False)
+        system_scores, azure_scores = (list(s) for s in scores)
+
+        result = getattr(plotter, method)(system_scores, azure_scores, str(tmp_path / "plot.png"))
+
+        assert result is not None
+
+
+class TestFigureReuse:
+    """重複使用Figure測試類"""
+
+    def test_figure_not_tracked_by_pyplot(self, plotter, scores, tmp_path, monkeypatch):
+        """測試重複使用的Figure不計入pyplot打開的圖形"""
+        monkeypatch.delenv("SKIP_PLOT_SCATTER", raising=False)
+        plt.close("all")
+
+        plotter.plot_scatter(*scores, str(tmp_path / "scatter.png"))
+
+        assert plt.get_fignums() == []
+
+    def test_many_instances_do_not_leak(self, scores, tmp_path, monkeypatch):
+        """測試建立大量實例時不觸發pyplot打開圖形過多的警告"""
+        monkeypatch.delenv("SKIP_PLOT_SCATTER", raising=False)
+        plt.close("all")
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", RuntimeWarning)
+            for i in range(25):
+                PlotResults().plot_scatter(*scores, str(tmp_path / f"scatter_{i}.png"))
+
+        assert plt.get_fignums() == []
+
+
+class TestFeatureImportance:
+    """特徵重要性圖測試類"""
+
+    @staticmethod
+    def drawn_features(plotter, feature_importance, output_path, top_n):
+        """返回條形圖中繪製的特徵名稱"""
+        with patch("utils.visualization.plt.barh") as barh:
+            plotter.plot_feature_importance(feature_importance, output_path, top_n=top_n)
+        return list(barh.call_args[0][0])
+
+    def test_ties_at_cutoff_keep_dict_order(self, plotter, tmp_path, monkeypatch):
+        """測試前N個的截斷處有並列值時，與穩定排序一樣保留字典順序靠前的特徵"""
+        monkeypatch.delenv("SKIP_PLOT_FEATURE_IMPORTANCE", raising=False)
+        rng = np.random.RandomState(0)
+        output_path = str(tmp_path / "fi.png")
+
+        for _ in range(20):
+            values = rng.randint(0, 4, size=30).astype(float)
+            feature_importance = {f"f{i}": v for i, v in enumerate(values)}
+            expected = [name for name, _ in sorted(
+                feature_importance.items(), key=lambda item: item[1], reverse=True
+            )[:10]]
+
+            assert self.drawn_features(plotter, feature_importance, output_path, 10) == expected
+
+    def test_top_n_without_ties(self, plotter, tmp_path, monkeypatch):
+        """測試沒有並列值時按重要性降序取前N個"""
+        monkeypatch.delenv("SKIP_PLOT_FEATURE_IMPORTANCE", raising=False)
+        feature_importance = {"a": 0.1, "b": 0.5, "c": 0.3, "d": 0.9}
+
+        drawn = self.drawn_features(plotter, feature_importance, str(tmp_path / "fi.png"), 2)
+
+        assert drawn == ["d", "b"]
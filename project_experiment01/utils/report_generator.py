@@ -4,17 +4,244 @@
 
 import os
 import json
-import yaml
+import hashlib
+import re
 import pandas as pd
+import matplotlib
+if not os.environ.get('MPLBACKEND'):
+    matplotlib.use('Agg')  # 非互動式後端，需在導入pyplot之前設置；可用MPLBACKEND覆蓋
 import matplotlib.pyplot as plt
 from datetime import datetime
 import numpy as np
 from pathlib import Path
-import markdown
-from jinja2 import Template
 import base64
+from collections import OrderedDict
 from io import BytesIO
-import seaborn as sns
+
+
+# 預設HTML模板
+_DEFAULT_HTML_TEMPLATE_SRC = """
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{ title }}</title>
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            line-height: 1.6;
+            color: #333;
+            max-width: 1200px;
+            margin: 0 auto;
+            padding: 20px;
+        }
+        h1, h2, h3, h4, h5, h6 {
+            color: #2c3e50;
+            margin-top: 1.5em;
+            margin-bottom: 0.5em;
+        }
+        table {
+            border-collapse: collapse;
+            width: 100%;
+            margin: 1em 0;
+        }
+        th, td {
+            border: 1px solid #ddd;
+            padding: 8px;
+            text-align: left;
+        }
+        th {
+            background-color: #f2f2f2;
+        }
+        tr:nth-child(even) {
+            background-color: #f9f9f9;
+        }
+        img {
+            max-width: 100%;
+            height: auto;
+            margin: 1em 0;
+        }
+        .figure {
+            text-align: center;
+            margin: 1.5em 0;
+        }
+        .figure img {
+            max-width: 800px;
+            border: 1px solid #ddd;
+            padding: 5px;
+        }
+        .figure figcaption {
+            font-style: italic;
+            margin-top: 5px;
+        }
+        .date {
+            color: #7f8c8d;
+            font-style: italic;
+            margin-bottom: 2em;
+        }
+        pre {
+            background-color: #f8f8f8;
+            border: 1px solid #ddd;
+            border-radius: 3px;
+            padding: 1em;
+            overflow-x: auto;
+        }
+        code {
+            font-family: monospace;
+            background-color: #f8f8f8;
+            padding: 2px 4px;
+            border-radius: 3px;
+        }
+        blockquote {
+            margin: 1em 0;
+            padding: 0.5em 1em;
+            border-left: 4px solid #ccc;
+            background-color: #f9f9f9;
+        }
+        .toc {
+            background-color: #f8f8f8;
+            padding: 1em;
+            border-radius: 5px;
+            margin-bottom: 2em;
+        }
+    </style>
+</head>
+<body>
+    {% macro render_figure(figure) %}
+    <div class="figure">
+        <img src="{% if (embed_images or not figure.path) and figure.base64 %}data:image/png;base64,{{ figure.base64 }}{% else %}{{ images_dir }}/{{ figure.filename }}{% endif %}" alt="{{ figure.caption }}"{% if figure.width %} width="{{ figure.width }}"{% endif %}{% if figure.height %} height="{{ figure.height }}"{% endif %}>
+        <figcaption>{{ figure.caption }}</figcaption>
+    </div>
+    {% endmacro %}
+    <h1>{{ title }}</h1>
+    <div class="date">{{ date }}</div>
+
+    <div class="toc">
+        <h2>目錄</h2>
+        <ul>
+        {% for section in sections %}
+            {% set sid = 'section-' ~ loop.index %}
+            {% set subs = section.subsections %}
+            <li><a href="#{{ sid }}">{{ section.title }}</a>
+            {% if subs %}
+                <ul>
+                {% for subsection in subs %}
+                    <li><a href="#{{ sid }}-{{ loop.index }}">{{ subsection.title }}</a></li>
+                {% endfor %}
+                </ul>
+            {% endif %}
+            </li>
+        {% endfor %}
+        </ul>
+    </div>
+
+    {% for section in sections %}
+    {% set sid = 'section-' ~ loop.index %}
+    {% set figs = section.figures %}
+    {% set subs = section.subsections %}
+    <div id="{{ sid }}">
+        <h{{ section.level }}>{{ section.title }}</h{{ section.level }}>
+        {{ section_html(section) }}
+
+        {% for figure in figs %}
+        {{ render_figure(figure) }}
+        {% endfor %}
+
+        {% for subsection in subs %}
+        {% set sub_figs = subsection.figures %}
+        <div id="{{ sid }}-{{ loop.index }}">
+            <h{{ subsection.level }}>{{ subsection.title }}</h{{ subsection.level }}>
+            {{ section_html(subsection) }}
+
+            {% for figure in sub_figs %}
+            {{ render_figure(figure) }}
+            {% endfor %}
+        </div>
+        {% endfor %}
+    </div>
+    {% endfor %}
+
+</body>
+</html>
+"""
+
+
+# 未寫入磁盤的圖片在章節內容中的佔位引用（以報告內唯一的圖片編號標識），生成Markdown時才替換為data URI
+_INLINE_FIGURE_SCHEME = "inline-figure:"
+_INLINE_FIGURE_REF = re.compile(r"\(" + re.escape(_INLINE_FIGURE_SCHEME) + r"(\d+)\)")
+# add_figure將圖片引用單獨寫在一行，按整行匹配，標題中含有方括號時也能完整去掉
+_INLINE_FIGURE_IMG = re.compile(r"^!\[.*\]\(" + re.escape(_INLINE_FIGURE_SCHEME) + r"\d+\)$", re.MULTILINE)
+
+
+def markdown_filter(text):
+    """
+    自定義Jinja2過濾器將Markdown轉換為HTML
+    
+    未寫入磁盤圖片的佔位引用會被去掉，這些圖片由模板根據章節的figures渲染（默認模板的render_figure）
+    """
+    import markdown
+    return markdown.markdown(_INLINE_FIGURE_IMG.sub("", text), extensions=['tables', 'fenced_code', 'codehilite'])
+
+
+# Markdown目錄錨點的字符轉換表
+_ANCHOR_TRANS = str.maketrans({' ': '-'})
+
+
+def _anchor(title):
+    """將章節標題轉換為Markdown目錄錨點"""
+    return title.translate(_ANCHOR_TRANS).lower()
+
+
+# 模塊級Jinja2環境，所有報告共用同一份已編譯模板緩存（首次生成HTML時才初始化）
+_ENV = None
+
+
+def _get_env():
+    """取得模塊級Jinja2環境，僅在需要HTML輸出時導入jinja2"""
+    global _ENV
+    if _ENV is None:
+        from jinja2 import Environment, DictLoader
+        _ENV = Environment(
+            loader=DictLoader({'default': _DEFAULT_HTML_TEMPLATE_SRC}),
+            autoescape=False,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            auto_reload=False,
+            cache_size=64,
+        )
+        _ENV.filters['markdown'] = markdown_filter
+    return _ENV
+
+
+# 自定義模板使用的Jinja2環境（共用過濾器，不啟用trim_blocks/lstrip_blocks）
+_CUSTOM_ENV = None
+
+# 自定義模板的已編譯緩存 {模板SHA-1: Template}，超出容量時淘汰最久未使用的模板
+_CUSTOM_TEMPLATE_CACHE_SIZE = 16
+_custom_templates = OrderedDict()
+
+
+def _get_custom_template(template):
+    """
+    取得自定義HTML模板的已編譯版本，按模板內容的SHA-1緩存
+    
+    自定義模板與原先的Template(template)一樣使用Jinja2默認的空白處理編譯
+    （不啟用默認模板使用的trim_blocks/lstrip_blocks），輸出不受影響
+    """
+    global _CUSTOM_ENV
+    template_key = hashlib.sha1(template.encode('utf-8')).hexdigest()
+    jinja_template = _custom_templates.get(template_key)
+    if jinja_template is None:
+        if _CUSTOM_ENV is None:
+            _CUSTOM_ENV = _get_env().overlay(trim_blocks=False, lstrip_blocks=False)
+        jinja_template = _CUSTOM_ENV.from_string(template)
+        _custom_templates[template_key] = jinja_template
+        if len(_custom_templates) > _CUSTOM_TEMPLATE_CACHE_SIZE:
+            _custom_templates.popitem(last=False)
+    else:
+        _custom_templates.move_to_end(template_key)
+    return jinja_template
 
 
 class ReportGenerator:
@@ -51,6 +278,17 @@ class ReportGenerator:
         # 圖像目錄
         self.images_dir = self.experiment_report_dir / "images"
         os.makedirs(self.images_dir, exist_ok=True)
+        
+        # 預先轉換為字符串路徑，供add_figure的熱路徑使用
+        self._reports_dir_str = os.fspath(self.reports_dir)
+        self._images_dir_str = os.fspath(self.images_dir)
+        
+        # 報告內的圖片計數，確保不同章節的圖片文件名不會互相覆蓋
+        self._figure_count = 0
+        
+        # 章節內容的HTML轉換緩存 {章節內容: HTML}，以內容本身為鍵，直接修改章節內容時不會取到舊結果；
+        # 通過add_section/add_paragraph更新報告時清空，避免保留過時條目
+        self._html_cache = {}
     
     def add_title(self, title):
         """設置報告標題"""
@@ -73,6 +311,7 @@ class ReportGenerator:
             "tables": [],
             "figures": []
         }
+        self._html_cache.clear()
         
         if level == 1:
             self.report_data["sections"].append(section)
@@ -137,6 +376,8 @@ class ReportGenerator:
             section["content"] = ""
         
         section["content"] += f"\n\n{content}"
+        # add_table和add_figure也經由此處更新內容
+        self._html_cache.clear()
     
     def add_table(self, data, headers=None, caption="表格", section=None):
         """
@@ -179,7 +420,8 @@ class ReportGenerator:
         table_ref = f"\n\n**{caption}**\n\n{markdown_table}\n"
         self.add_paragraph(table_ref, section)
     
-    def add_figure(self, fig=None, image_path=None, caption="圖片", section=None, width=None, height=None, dpi=150):
+    def add_figure(self, fig=None, image_path=None, caption="圖片", section=None, width=None, height=None, dpi=150,
+                   persist_to_disk=True):
         """
         添加圖片
         
@@ -191,6 +433,8 @@ class ReportGenerator:
             width (int): 圖片寬度（僅用於HTML輸出）
             height (int): 圖片高度（僅用於HTML輸出）
             dpi (int): 圖片DPI
+            persist_to_disk (bool): 是否將圖片寫入images目錄，為False時僅保留內存中的數據，
+                報告中以data URI內嵌圖片
         """
         if section is None:
             if self.report_data["sections"]:
@@ -198,40 +442,45 @@ class ReportGenerator:
             else:
                 section = self.add_section("未命名章節")
         
+        # 報告內唯一的圖片編號
+        figure_index = self._figure_count
+        self._figure_count += 1
+        
         if fig is not None:
-            # 保存圖片到文件
-            img_filename = f"{self.experiment_name}_{len(section.get('figures', []))}.png"
-            img_path = self.images_dir / img_filename
-            fig.savefig(img_path, dpi=dpi, bbox_inches='tight')
+            img_filename = f"{self.experiment_name}_{figure_index}.png"
             
-            # 獲取base64編碼的圖片數據（用於HTML）
+            # 只渲染一次圖片，文件和base64共用同一份PNG數據
             buf = BytesIO()
             fig.savefig(buf, format='png', dpi=dpi, bbox_inches='tight')
-            buf.seek(0)
-            img_base64 = base64.b64encode(buf.read()).decode('utf-8')
+            img_bytes = buf.getvalue()
             
         elif image_path is not None:
             # 使用提供的圖片路徑
             img_filename = os.path.basename(image_path)
-            img_path = Path(image_path)
-            
-            # 複製圖片到報告目錄
-            import shutil
-            target_path = self.images_dir / img_filename
-            shutil.copy(img_path, target_path)
-            img_path = target_path
             
-            # 讀取圖片生成base64
-            with open(img_path, 'rb') as img_file:
-                img_base64 = base64.b64encode(img_file.read()).decode('utf-8')
+            # 讀取一次圖片數據，同時用於複製到報告目錄和生成base64
+            with open(image_path, 'rb') as img_file:
+                img_bytes = img_file.read()
         else:
             raise ValueError("必須提供fig或image_path參數")
         
+        if persist_to_disk:
+            # 保存圖片到報告目錄
+            img_path = os.path.join(self._images_dir_str, img_filename)
+            with open(img_path, 'wb') as img_file:
+                img_file.write(img_bytes)
+        else:
+            img_path = None
+        
+        # 獲取base64編碼的圖片數據（用於HTML）
+        img_base64 = base64.b64encode(img_bytes).decode('utf-8')
+        
         # 添加圖片到章節
         figure_data = {
             "caption": caption,
-            "path": str(img_path),
+            "path": img_path,
             "filename": img_filename,
+            "index": figure_index,
             "base64": img_base64,
             "width": width,
             "height": height
@@ -242,9 +491,13 @@ class ReportGenerator:
         
         section["figures"].append(figure_data)
         
-        # 在內容中引用圖片
-        rel_path = os.path.relpath(img_path, self.reports_dir)
-        figure_ref = f"\n\n**{caption}**\n\n![{caption}]({rel_path})\n"
+        # 在內容中引用圖片，未寫入文件的圖片只保留佔位引用，
+        # 避免圖片數據寫入JSON或在HTML中重複內嵌
+        if img_path is not None:
+            img_ref = os.path.relpath(img_path, self._reports_dir_str)
+        else:
+            img_ref = f"{_INLINE_FIGURE_SCHEME}{figure_index}"
+        figure_ref = f"\n\n**{caption}**\n\n![{caption}]({img_ref})\n"
         self.add_paragraph(figure_ref, section)
     
     def add_metrics_summary(self, metrics, section_title="實驗指標摘要"):
@@ -280,14 +533,21 @@ class ReportGenerator:
             
             self.add_table(metrics_table, caption="實驗指標表", section=section)
             
-            # 如果有多個時間步的指標，繪製趨勢圖
-            for name, values in metrics.items():
-                if isinstance(values, list) and len(values) > 1:
+            # 如果有多個時間步的指標，繪製趨勢圖（所有指標共用同一個Figure）
+            plottable = [(name, values) for name, values in metrics.items()
+                         if isinstance(values, list) and len(values) > 1]
+            if not plottable:
+                return
+            
+            fig = plt.figure(figsize=(10, 6))
+            try:
+                for name, values in plottable:
                     try:
                         steps = [v.get("step", i) for i, v in enumerate(values)]
                         metric_values = [v["value"] for v in values]
                         
-                        fig, ax = plt.subplots(figsize=(10, 6))
+                        fig.clear()
+                        ax = fig.add_subplot()
                         ax.plot(steps, metric_values, marker='o', linestyle='-')
                         ax.set_title(f"{name} 趨勢")
                         ax.set_xlabel("步驟")
@@ -295,9 +555,10 @@ class ReportGenerator:
                         ax.grid(True)
                         
                         self.add_figure(fig, caption=f"{name} 趨勢圖", section=section)
-                        plt.close(fig)
                     except Exception as e:
                         print(f"繪製 {name} 趨勢圖時出錯: {e}")
+            finally:
+                plt.close(fig)
     
     def add_comparison_table(self, stack_results, metrics, section_title="實驗堆疊比較"):
         """
@@ -321,25 +582,29 @@ class ReportGenerator:
         df = pd.DataFrame(comparison_data)
         self.add_table(df, caption="堆疊性能比較", section=section)
         
-        # 為每個指標生成比較圖
-        for metric in metrics:
-            try:
-                fig, ax = plt.subplots(figsize=(10, 6))
-                
-                stacks = [result["堆疊"] for result in comparison_data]
-                values = [result.get(metric, 0) for result in comparison_data]
-                
-                # 繪製條形圖
-                sns.barplot(x=stacks, y=values, ax=ax)
-                ax.set_title(f"{metric} 比較")
-                ax.set_xlabel("實驗堆疊")
-                ax.set_ylabel(metric)
-                ax.tick_params(axis='x', rotation=45)
-                
-                self.add_figure(fig, caption=f"{metric} 堆疊比較", section=section)
-                plt.close(fig)
-            except Exception as e:
-                print(f"繪製 {metric} 比較圖時出錯: {e}")
+        # 為每個指標生成比較圖（所有指標共用同一個Figure）
+        stacks = [result["堆疊"] for result in comparison_data]
+        fig = plt.figure(figsize=(10, 6))
+        try:
+            for metric in metrics:
+                try:
+                    values = [result.get(metric, 0) for result in comparison_data]
+                    
+                    fig.clear()
+                    ax = fig.add_subplot()
+                    
+                    # 繪製條形圖
+                    ax.bar(stacks, values)
+                    ax.set_title(f"{metric} 比較")
+                    ax.set_xlabel("實驗堆疊")
+                    ax.set_ylabel(metric)
+                    ax.tick_params(axis='x', rotation=45)
+                    
+                    self.add_figure(fig, caption=f"{metric} 堆疊比較", section=section)
+                except Exception as e:
+                    print(f"繪製 {metric} 比較圖時出錯: {e}")
+        finally:
+            plt.close(fig)
     
     def add_experiment_config(self, config, section_title="實驗配置"):
         """
@@ -352,6 +617,7 @@ class ReportGenerator:
         section = self.add_section(section_title)
         
         # 格式化配置為YAML字符串
+        import yaml
         config_yaml = yaml.dump(config, default_flow_style=False, allow_unicode=True)
         self.add_paragraph(f"```yaml\n{config_yaml}\n```", section)
     
@@ -391,11 +657,9 @@ class ReportGenerator:
         # 生成目錄
         md_content += "## 目錄\n\n"
         for section in self.report_data["sections"]:
-            section_marker = "#" * section["level"]
-            md_content += f"- [{section['title']}](#{section['title'].lower().replace(' ', '-')})\n"
+            md_content += f"- [{section['title']}](#{_anchor(section['title'])})\n"
             for subsection in section.get("subsections", []):
-                subsection_marker = "#" * subsection["level"]
-                md_content += f"  - [{subsection['title']}](#{subsection['title'].lower().replace(' ', '-')})\n"
+                md_content += f"  - [{subsection['title']}](#{_anchor(subsection['title'])})\n"
         
         md_content += "\n\n---\n\n"
         
@@ -403,12 +667,35 @@ class ReportGenerator:
         for section in self.report_data["sections"]:
             md_content += self._section_to_markdown(section)
         
+        # 未寫入磁盤的圖片在此替換為data URI
+        if _INLINE_FIGURE_SCHEME in md_content:
+            inline_figures = self._collect_inline_figures()
+            md_content = _INLINE_FIGURE_REF.sub(
+                lambda m: f"(data:image/png;base64,{inline_figures.get(int(m.group(1)), '')})",
+                md_content
+            )
+        
         # 寫入文件
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(md_content)
         
         return str(output_path)
     
+    def _collect_inline_figures(self):
+        """收集未寫入磁盤的圖片 {圖片編號: base64數據}"""
+        inline_figures = {}
+        
+        def collect(section):
+            for figure in section.get("figures", []):
+                if figure.get("path") is None and figure.get("base64"):
+                    inline_figures[figure["index"]] = figure["base64"]
+            for subsection in section.get("subsections", []):
+                collect(subsection)
+        
+        for section in self.report_data["sections"]:
+            collect(section)
+        return inline_figures
+    
     def _section_to_markdown(self, section, base_level=0):
         """將章節轉換為Markdown格式"""
         level = section.get("level", 1) + base_level
@@ -425,13 +712,24 @@ class ReportGenerator:
         
         return md
     
-    def generate_html(self, output_path=None, template=None):
+    def _section_to_html(self, section):
+        """將章節內容轉換為HTML，供HTML模板使用"""
+        content = section.get("content", "")
+        html = self._html_cache.get(content)
+        if html is None:
+            # 未寫入磁盤的圖片由模板的render_figure內嵌，佔位引用由markdown_filter去掉
+            html = markdown_filter(content)
+            self._html_cache[content] = html
+        return html
+    
+    def generate_html(self, output_path=None, template=None, embed_images=False):
         """
         生成HTML格式報告
         
         參數:
             output_path (str): 輸出文件路徑，如果為None則自動生成
             template (str): 自定義HTML模板
+            embed_images (bool): 是否以base64內嵌圖片，默認引用images目錄中的圖片文件
         
         返回:
             str: 輸出文件路徑
@@ -439,164 +737,23 @@ class ReportGenerator:
         if output_path is None:
             output_path = self.experiment_report_dir / f"{self.experiment_name}_report.html"
         
-        # 預設HTML模板
+        # 取得已編譯的模板，重複調用時由模板緩存提供
         if template is None:
-            template = """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>{{ title }}</title>
-                <style>
-                    body {
-                        font-family: Arial, sans-serif;
-                        line-height: 1.6;
-                        color: #333;
-                        max-width: 1200px;
-                        margin: 0 auto;
-                        padding: 20px;
-                    }
-                    h1, h2, h3, h4, h5, h6 {
-                        color: #2c3e50;
-                        margin-top: 1.5em;
-                        margin-bottom: 0.5em;
-                    }
-                    table {
-                        border-collapse: collapse;
-                        width: 100%;
-                        margin: 1em 0;
-                    }
-                    th, td {
-                        border: 1px solid #ddd;
-                        padding: 8px;
-                        text-align: left;
-                    }
-                    th {
-                        background-color: #f2f2f2;
-                    }
-                    tr:nth-child(even) {
-                        background-color: #f9f9f9;
-                    }
-                    img {
-                        max-width: 100%;
-                        height: auto;
-                        margin: 1em 0;
-                    }
-                    .figure {
-                        text-align: center;
-                        margin: 1.5em 0;
-                    }
-                    .figure img {
-                        max-width: 800px;
-                        border: 1px solid #ddd;
-                        padding: 5px;
-                    }
-                    .figure figcaption {
-                        font-style: italic;
-                        margin-top: 5px;
-                    }
-                    .date {
-                        color: #7f8c8d;
-                        font-style: italic;
-                        margin-bottom: 2em;
-                    }
-                    pre {
-                        background-color: #f8f8f8;
-                        border: 1px solid #ddd;
-                        border-radius: 3px;
-                        padding: 1em;
-                        overflow-x: auto;
-                    }
-                    code {
-                        font-family: monospace;
-                        background-color: #f8f8f8;
-                        padding: 2px 4px;
-                        border-radius: 3px;
-                    }
-                    blockquote {
-                        margin: 1em 0;
-                        padding: 0.5em 1em;
-                        border-left: 4px solid #ccc;
-                        background-color: #f9f9f9;
-                    }
-                    .toc {
-                        background-color: #f8f8f8;
-                        padding: 1em;
-                        border-radius: 5px;
-                        margin-bottom: 2em;
-                    }
-                </style>
-            </head>
-            <body>
-                <h1>{{ title }}</h1>
-                <div class="date">{{ date }}</div>
-                
-                <div class="toc">
-                    <h2>目錄</h2>
-                    <ul>
-                    {% for section in sections %}
-                        <li><a href="#section-{{ loop.index }}">{{ section.title }}</a>
-                        {% if section.subsections %}
-                            <ul>
-                            {% for subsection in section.subsections %}
-                                <li><a href="#section-{{ loop.index }}-{{ loop.index }}">{{ subsection.title }}</a></li>
-                            {% endfor %}
-                            </ul>
-                        {% endif %}
-                        </li>
-                    {% endfor %}
-                    </ul>
-                </div>
-                
-                {% for section in sections %}
-                <div id="section-{{ loop.index }}">
-                    <h{{ section.level }}>{{ section.title }}</h{{ section.level }}>
-                    {{ section.content|markdown }}
-                    
-                    {% for figure in section.figures %}
-                    <div class="figure">
-                        <img src="data:image/png;base64,{{ figure.base64 }}" 
-                             alt="{{ figure.caption }}"
-                             {% if figure.width %}width="{{ figure.width }}"{% endif %}
-                             {% if figure.height %}height="{{ figure.height }}"{% endif %}>
-                        <figcaption>{{ figure.caption }}</figcaption>
-                    </div>
-                    {% endfor %}
-                    
-                    {% for subsection in section.subsections %}
-                    <div id="section-{{ loop.parent.index }}-{{ loop.index }}">
-                        <h{{ subsection.level }}>{{ subsection.title }}</h{{ subsection.level }}>
-                        {{ subsection.content|markdown }}
-                        
-                        {% for figure in subsection.figures %}
-                        <div class="figure">
-                            <img src="data:image/png;base64,{{ figure.base64 }}" 
-                                 alt="{{ figure.caption }}"
-                                 {% if figure.width %}width="{{ figure.width }}"{% endif %}
-                                 {% if figure.height %}height="{{ figure.height }}"{% endif %}>
-                            <figcaption>{{ figure.caption }}</figcaption>
-                        </div>
-                        {% endfor %}
-                    </div>
-                    {% endfor %}
-                </div>
-                {% endfor %}
-                
-            </body>
-            </html>
-            """
-        
-        # 自定義Jinja2過濾器將Markdown轉換為HTML
-        def markdown_filter(text):
-            return markdown.markdown(text, extensions=['tables', 'fenced_code', 'codehilite'])
-        
-        # 建立Jinja2模板
-        jinja_template = Template(template)
-        jinja_template.environment.filters['markdown'] = markdown_filter
+            jinja_template = _get_env().get_template('default')
+        else:
+            jinja_template = _get_custom_template(template)
         
         # 渲染HTML
-        html_content = jinja_template.render(**self.report_data)
+        # 圖片目錄相對於HTML文件所在目錄的路徑
+        images_dir = os.path.relpath(
+            self._images_dir_str, os.path.dirname(os.path.abspath(output_path))
+        ).replace(os.sep, '/')
+        html_content = jinja_template.render(
+            embed_images=embed_images,
+            images_dir=images_dir,
+            section_html=self._section_to_html,
+            **self.report_data
+        )
         
         # 寫入文件
         with open(output_path, 'w', encoding='utf-8') as f:
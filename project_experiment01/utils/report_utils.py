@@ -1,28 +1,167 @@
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import datetime
-import numpy as np
 import jinja2
 import markdown
 import weasyprint
+try:
+    from weasyprint.text.fonts import FontConfiguration
+except ImportError:  # WeasyPrint < 53
+    from weasyprint.fonts import FontConfiguration
 import yaml
 import json
+import hashlib
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from operator import itemgetter
 from pathlib import Path
+from types import MappingProxyType
+
+try:
+    from yaml import CSafeDumper as YamlDumper
+except ImportError:  # 未編譯libyaml時使用純Python實現
+    from yaml import SafeDumper as YamlDumper
+
+try:
+    import orjson
+except ImportError:  # orjson為可選依賴，未安裝時使用標準庫json
+    orjson = None
+
+# 鏈式查找使用的共享空映射（唯讀），避免每次查找都新建空字典
+_EMPTY = MappingProxyType({})
+
+# 隨模塊提供的默認報告模板目錄
+DEFAULT_TEMPLATE_DIR = Path(__file__).resolve().parent / "templates"
+REPORT_TEMPLATE_NAMES = ("summary_report_template.md", "detailed_report_template.md")
+
+# PDF報告的基本樣式，每個進程只解析一次（由_get_pdf_converter首次調用時解析），
+# 以CSS對象傳給WeasyPrint，HTML中不再內嵌<style>
+_REPORT_CSS_TEXT = """
+body { font-family: Arial, sans-serif; margin: 40px; }
+h1 { color: #2c3e50; }
+h2 { color: #3498db; margin-top: 20px; }
+h3 { color: #2980b9; }
+table { border-collapse: collapse; width: 100%; margin: 20px 0; }
+th, td { padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }
+th { background-color: #f2f2f2; }
+code { background: #f8f8f8; padding: 2px 5px; border-radius: 3px; }
+pre { background: #f8f8f8; padding: 15px; border-radius: 5px; overflow-x: auto; }
+img { max-width: 100%; height: auto; }
+"""
+
+# PDF轉換使用的HTML外框
+_STYLED_HTML_PREFIX = """
+<html>
+<head>
+</head>
+<body>
+"""
+_STYLED_HTML_SUFFIX = """
+</body>
+</html>
+"""
+
+# 進程內共用的PDF轉換器，首次使用時建立（ReportGenerator實例和工作進程共用）
+_pdf_converter = None
+
+def _create_pdf_converter():
+    """建立PDF轉換所需的Markdown轉換器、字體配置和樣式表"""
+    md = markdown.Markdown(extensions=['tables', 'fenced_code', 'codehilite'])
+    font_config = FontConfiguration()
+    report_css = weasyprint.CSS(string=_REPORT_CSS_TEXT, font_config=font_config)
+    return md, font_config, report_css
+
+def _get_pdf_converter():
+    """取得進程內共用的PDF轉換器，首次調用時建立"""
+    global _pdf_converter
+    if _pdf_converter is None:
+        _pdf_converter = _create_pdf_converter()
+    return _pdf_converter
+
+# PDF內容摘要的初始狀態，已包含樣式表，樣式變更時舊PDF不會被誤用
+_PDF_DIGEST_BASE = hashlib.blake2b(_REPORT_CSS_TEXT.encode("utf-8"), digest_size=16)
+
+def _cached_pdf(digest_path, digest):
+    """返回摘要文件記錄的PDF路徑（摘要相同且文件仍存在時），否則返回None"""
+    try:
+        recorded_digest, pdf_name = Path(digest_path).read_text(encoding="utf-8").split("\n", 1)
+    except (OSError, ValueError):
+        return None
+    cached_pdf = Path(digest_path).with_name(pdf_name)
+    if recorded_digest == digest and cached_pdf.exists():
+        return cached_pdf
+    return None
+
+def _write_pdf(md, font_config, report_css, md_content, pdf_path, pdf_cache=None):
+    """將Markdown內容轉換為PDF；提供pdf_cache (摘要文件路徑, 內容摘要) 且上次生成的PDF摘要相同時，複製該PDF而不重新轉換"""
+    try:
+        cached_pdf = _cached_pdf(*pdf_cache) if pdf_cache is not None else None
+        if cached_pdf is not None:
+            if not os.path.exists(pdf_path) or not os.path.samefile(cached_pdf, pdf_path):
+                shutil.copyfile(cached_pdf, pdf_path)
+        else:
+            # 轉換為HTML
+            html_content = md.reset().convert(md_content)
+            
+            # 添加HTML外框，樣式由預先解析的樣式表提供
+            styled_html = _STYLED_HTML_PREFIX + html_content + _STYLED_HTML_SUFFIX
+            
+            # 轉換為PDF
+            weasyprint.HTML(string=styled_html).write_pdf(
+                pdf_path,
+                stylesheets=[report_css],
+                font_config=font_config
+            )
+        
+        if pdf_cache is not None:
+            # 記錄最新的PDF，之後的重新生成從此複製
+            digest_path, digest = pdf_cache
+            Path(digest_path).write_text(f"{digest}\n{os.path.basename(pdf_path)}", encoding="utf-8")
+        
+    except Exception as e:
+        print(f"PDF轉換錯誤: {str(e)}")
+
+def _init_pdf_worker():
+    """工作進程初始化：丟棄fork時從父進程繼承的PDF轉換器（含fontconfig/pango狀態），由工作進程自行建立"""
+    global _pdf_converter
+    _pdf_converter = None
+
+def _convert_md_to_pdf_worker(md_content, pdf_path, pdf_cache=None):
+    """在ProcessPoolExecutor工作進程中將Markdown內容轉換為PDF"""
+    _write_pdf(*_get_pdf_converter(), md_content, pdf_path, pdf_cache)
+
+@dataclass
+class ResultsAnalysis:
+    """單次遍歷實驗堆疊結果所得到的分析數據"""
+    has_stacks: bool = False
+    stacks_summary: list = field(default_factory=list)
+    detailed_stacks: list = field(default_factory=list)
+    # 概述報告的最佳堆疊（依R²，缺失時依相關性）
+    best_stack: str = None
+    best_score: float = float('-inf')
+    # 詳細報告的最佳堆疊（依R²）
+    best_r2_stack: str = None
+    best_r2_score: float = float('-inf')
+    best_components: dict = field(default_factory=dict)
+    metrics_comparison: dict = field(default_factory=dict)
 
 class ReportGenerator:
     """實驗報告生成器，用於創建Markdown和PDF格式的實驗結果報告"""
     
-    def __init__(self, report_dir="./reports", template_dir="./utils/templates"):
+    def __init__(self, report_dir="./reports", template_dir="./utils/templates", cache_pdf=False):
         """
         初始化報告生成器
         
         參數:
             report_dir (str): 報告存儲目錄
             template_dir (str): 報告模板目錄
+            cache_pdf (bool): 是否緩存PDF：每個實驗的每種報告在pdf目錄中寫入 {實驗名稱}_{類型}.sha 摘要文件，
+                重新生成的報告內容（不計生成時間）未變更時複製上次的PDF而不重新排版，
+                複製的PDF中顯示的仍是上次的生成時間
         """
         self.report_dir = Path(report_dir)
         self.template_dir = Path(template_dir)
+        self.cache_pdf = cache_pdf
         
         # 創建報告目錄
         self.md_dir = self.report_dir / "markdown"
@@ -30,109 +169,47 @@ class ReportGenerator:
         self.md_dir.mkdir(parents=True, exist_ok=True)
         self.pdf_dir.mkdir(parents=True, exist_ok=True)
         
-        # 初始化Jinja2模板引擎
+        # 模板字節碼緩存，新進程可直接載入已編譯的模板
+        bytecode_cache_dir = self.report_dir / ".jinja_cache"
+        bytecode_cache_dir.mkdir(parents=True, exist_ok=True)
+        bytecode_cache = jinja2.FileSystemBytecodeCache(
+            directory=str(bytecode_cache_dir),
+            pattern="%s.cache"
+        )
+        
+        # 初始化Jinja2模板引擎（關閉自動重載，渲染時不再檢查模板文件是否更新）
+        # 優先使用template_dir中的自定義模板，找不到時使用隨模塊提供的默認模板
         self.env = jinja2.Environment(
-            loader=jinja2.FileSystemLoader(self.template_dir),
-            autoescape=jinja2.select_autoescape(['html', 'xml'])
+            loader=jinja2.ChoiceLoader([
+                jinja2.FileSystemLoader(self.template_dir),
+                jinja2.FileSystemLoader(DEFAULT_TEMPLATE_DIR)
+            ]),
+            autoescape=jinja2.select_autoescape(['html', 'xml']),
+            auto_reload=False,
+            cache_size=400,
+            bytecode_cache=bytecode_cache
         )
         
-        # 創建默認模板（如果模板目錄不存在）
-        if not self.template_dir.exists():
-            self.template_dir.mkdir(parents=True, exist_ok=True)
-            self._create_default_templates()
-    
-    def _create_default_templates(self):
-        """創建默認的報告模板"""
-        # 實驗總結報告模板
-        summary_template = """# 實驗報告摘要
-
-## 概述
-- **實驗名稱**: {{ experiment_name }}
-- **執行時間**: {{ execution_time }}
-- **執行者**: {{ executor }}
-
-## 實驗配置
-{{ config_summary }}
-
-## 執行摘要
-{{ execution_summary }}
-
-## 實驗堆疊結果
-{% for stack in stacks %}
-### {{ stack.name }}
-- **描述**: {{ stack.description }}
-- **組件**: {{ stack.components }}
-- **主要評估指標**:
-{% for metric_name, metric_value in stack.metrics.items() %}
-  - {{ metric_name }}: {{ metric_value }}
-{% endfor %}
-{% endfor %}
-
-## 結論
-{{ conclusion }}
-
-"""
+        # Markdown轉換器、WeasyPrint字體配置和樣式表，同一進程內的所有實例共用
+        # （擴展載入、fontconfig初始化和CSS解析每個進程只進行一次，每份報告轉換前重置Markdown狀態）
+        self._md, self._font_config, self._report_css = _get_pdf_converter()
         
-        # 詳細實驗報告模板
-        detailed_template = """# 詳細實驗報告
-
-## 實驗信息
-- **實驗名稱**: {{ experiment_name }}
-- **執行時間**: {{ execution_time }}
-- **執行者**: {{ executor }}
-- **目的**: {{ purpose }}
-
-## 實驗配置
-```yaml
-{{ config_details }}
-```
-
-## 資料集描述
-{{ dataset_description }}
-
-## 實驗堆疊詳細結果
-{% for stack in stacks %}
-### {{ stack.name }}
-#### 配置
-```yaml
-{{ stack.config }}
-```
-
-#### 處理流程
-{{ stack.process_description }}
-
-#### 評估指標
-{% for metric_name, metric_value in stack.metrics.items() %}
-- **{{ metric_name }}**: {{ metric_value }}
-{% endfor %}
-
-#### 圖表分析
-{{ stack.plot_descriptions }}
-
-![{{ stack.name }}_performance]({{ stack.plot_path }})
-
-{% endfor %}
-
-## 比較分析
-{{ comparison_analysis }}
-
-## 結論與推薦
-{{ conclusion }}
-
-## 附錄: 原始結果數據
-```json
-{{ raw_data }}
-```
-"""
-        
-        # 寫入模板文件
-        with open(self.template_dir / "summary_report_template.md", "w", encoding="utf-8") as f:
-            f.write(summary_template)
-            
-        with open(self.template_dir / "detailed_report_template.md", "w", encoding="utf-8") as f:
-            f.write(detailed_template)
+        # 預先載入並緩存已編譯的模板
+        self._summary_tpl = self.env.get_template("summary_report_template.md")
+        self._detailed_tpl = self.env.get_template("detailed_report_template.md")
+    
+    @staticmethod
+    def _create_default_templates(template_dir):
+        """將默認的報告模板複製到模板目錄，作為自定義模板的起點"""
+        template_dir = Path(template_dir)
+        template_dir.mkdir(parents=True, exist_ok=True)
+        
+        for template_name in REPORT_TEMPLATE_NAMES:
+            target_path = template_dir / template_name
+            if not target_path.exists():
+                shutil.copyfile(DEFAULT_TEMPLATE_DIR / template_name, target_path)
     
-    def generate_summary_report(self, experiment_name, results_data, config, executor="自動化系統"):
+    def generate_summary_report(self, experiment_name, results_data, config, executor="自動化系統", pdf=True):
         """
         生成實驗概述報告
         
@@ -141,40 +218,52 @@ class ReportGenerator:
             results_data (dict): 實驗結果數據
             config (dict): 實驗配置
             executor (str): 執行者名稱
+            pdf (bool): 是否同時生成PDF，為False時只寫入Markdown
         
         返回:
             str: 生成報告的文件路徑
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        md_path, pdf_path, report_content, pdf_cache = self._render_summary_report(
+            experiment_name, results_data, config, executor, keep_content=pdf
+        )
+        
+        # 轉換為PDF（直接使用內存中的報告內容）
+        if pdf:
+            self._convert_md_to_pdf(report_content, pdf_path, pdf_cache)
+        
+        return str(md_path)
+    
+    def _render_summary_report(self, experiment_name, results_data, config, executor, keep_content=True):
+        """渲染並保存概述報告的Markdown，返回 (md_path, pdf_path, report_content, pdf_cache)"""
+        # 文件名和報告內容使用同一個時間點
+        now = datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
+        execution_time = now.strftime("%Y-%m-%d %H:%M:%S")
         report_name = f"{experiment_name}_{timestamp}_summary"
         
+        analysis = self._analyze_results(results_data)
+        
         # 準備模板數據
         template_data = {
             "experiment_name": experiment_name,
-            "execution_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "execution_time": execution_time,
             "executor": executor,
-            "config_summary": yaml.dump(self._extract_config_summary(config), default_flow_style=False, allow_unicode=True),
+            "config_summary": yaml.dump(self._extract_config_summary(config), Dumper=YamlDumper, default_flow_style=False, allow_unicode=True),
             "execution_summary": self._generate_execution_summary(results_data),
-            "stacks": self._extract_stack_results(results_data),
-            "conclusion": self._generate_conclusion(results_data)
+            "stacks": analysis.stacks_summary,
+            "conclusion": self._generate_conclusion(analysis)
         }
         
-        # 渲染模板
-        template = self.env.get_template("summary_report_template.md")
-        report_content = template.render(**template_data)
-        
-        # 保存報告
+        # 渲染模板並寫入報告
         md_path = self.md_dir / f"{report_name}.md"
-        with open(md_path, "w", encoding="utf-8") as f:
-            f.write(report_content)
+        report_content = self._write_report(self._summary_tpl, template_data, md_path, keep_content)
         
-        # 轉換為PDF
         pdf_path = self.pdf_dir / f"{report_name}.pdf"
-        self._convert_md_to_pdf(md_path, pdf_path)
-        
-        return str(md_path)
+        pdf_cache = self._pdf_cache_entry(f"{experiment_name}_summary", report_content, timestamp, execution_time)
+        return md_path, pdf_path, report_content, pdf_cache
     
-    def generate_detailed_report(self, experiment_name, results_data, config, plots_data, purpose="", executor="自動化系統"):
+    def generate_detailed_report(self, experiment_name, results_data, config, plots_data, purpose="", executor="自動化系統",
+                                 pdf=True):
         """
         生成詳細實驗報告
         
@@ -185,82 +274,175 @@ class ReportGenerator:
             plots_data (dict): 圖表數據路徑和描述
             purpose (str): 實驗目的
             executor (str): 執行者名稱
+            pdf (bool): 是否同時生成PDF，為False時只寫入Markdown
         
         返回:
             str: 生成報告的文件路徑
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        md_path, pdf_path, report_content, pdf_cache = self._render_detailed_report(
+            experiment_name, results_data, config, plots_data, purpose, executor, keep_content=pdf
+        )
+        
+        # 轉換為PDF（直接使用內存中的報告內容）
+        if pdf:
+            self._convert_md_to_pdf(report_content, pdf_path, pdf_cache)
+        
+        return str(md_path)
+    
+    def _render_detailed_report(self, experiment_name, results_data, config, plots_data, purpose, executor,
+                                keep_content=True):
+        """渲染並保存詳細報告的Markdown，返回 (md_path, pdf_path, report_content, pdf_cache)"""
+        # 文件名和報告內容使用同一個時間點
+        now = datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
+        execution_time = now.strftime("%Y-%m-%d %H:%M:%S")
         report_name = f"{experiment_name}_{timestamp}_detailed"
         
+        analysis = self._analyze_results(results_data, config, plots_data)
+        
+        # 原始結果數據直接寫入報告旁的JSON文件，報告中只保留鏈接
+        raw_data_path = self.md_dir / f"{report_name}_raw.json"
+        raw_data_path.write_bytes(self._dump_json(results_data))
+        
         # 準備模板數據
         template_data = {
             "experiment_name": experiment_name,
-            "execution_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "execution_time": execution_time,
             "executor": executor,
             "purpose": purpose,
-            "config_details": yaml.dump(config, default_flow_style=False, allow_unicode=True),
+            "config_details": yaml.dump(config, Dumper=YamlDumper, default_flow_style=False, allow_unicode=True),
             "dataset_description": self._extract_dataset_info(config),
-            "stacks": self._extract_detailed_stack_results(results_data, config, plots_data),
-            "comparison_analysis": self._generate_comparison_analysis(results_data),
-            "conclusion": self._generate_detailed_conclusion(results_data),
-            "raw_data": json.dumps(results_data, indent=2, ensure_ascii=False)
+            "stacks": analysis.detailed_stacks,
+            "comparison_analysis": self._generate_comparison_analysis(analysis),
+            "conclusion": self._generate_detailed_conclusion(analysis),
+            "raw_data_file": raw_data_path.name
         }
         
-        # 渲染模板
-        template = self.env.get_template("detailed_report_template.md")
-        report_content = template.render(**template_data)
-        
-        # 保存報告
+        # 渲染模板並寫入報告
         md_path = self.md_dir / f"{report_name}.md"
-        with open(md_path, "w", encoding="utf-8") as f:
-            f.write(report_content)
+        report_content = self._write_report(self._detailed_tpl, template_data, md_path, keep_content)
         
-        # 轉換為PDF
         pdf_path = self.pdf_dir / f"{report_name}.pdf"
-        self._convert_md_to_pdf(md_path, pdf_path)
+        pdf_cache = self._pdf_cache_entry(f"{experiment_name}_detailed", report_content, timestamp, execution_time)
+        return md_path, pdf_path, report_content, pdf_cache
+    
+    @staticmethod
+    def _write_report(template, template_data, path, keep_content=True):
+        """
+        渲染模板並寫入報告文件
         
-        return str(md_path)
+        參數:
+            template (jinja2.Template): 要渲染的模板
+            template_data (dict): 模板數據
+            path (Path): 輸出文件路徑
+            keep_content (bool): 是否返回渲染後的內容（PDF轉換需要）；為False時以流式方式直接寫入文件，
+                不在內存中保留完整報告
+        
+        返回:
+            str: 渲染後的完整內容，keep_content為False時返回None
+        """
+        if not keep_content:
+            template.stream(**template_data).dump(str(path), encoding="utf-8")
+            return None
+        
+        report_content = template.render(**template_data)
+        path.write_bytes(report_content.encode("utf-8"))  # 單次寫入整個報告
+        return report_content
+    
+    def _pdf_cache_entry(self, cache_key, report_content, *volatile):
+        """
+        計算報告的PDF緩存條目
+        
+        參數:
+            cache_key (str): 不含時間戳的報告名稱，同一實驗的每次重新生成共用同一條目
+            report_content (str): 渲染後的報告內容
+            *volatile (str): 每次生成都不同的字符串（時間戳），計算摘要前從內容中移除
+        
+        返回:
+            tuple: (摘要文件路徑, 內容摘要)，未啟用cache_pdf或沒有報告內容時返回None
+        """
+        if not self.cache_pdf or report_content is None:
+            return None
+        
+        for value in volatile:
+            report_content = report_content.replace(value, "")
+        hasher = _PDF_DIGEST_BASE.copy()
+        hasher.update(report_content.encode("utf-8"))
+        return str(self.pdf_dir / f"{cache_key}.sha"), hasher.hexdigest()
     
-    def _convert_md_to_pdf(self, md_path, pdf_path):
-        """將Markdown文件轉換為PDF"""
-        try:
-            with open(md_path, "r", encoding="utf-8") as f:
-                md_content = f.read()
+    def generate_batch(self, experiment_configs, max_workers=None):
+        """
+        批量生成多個實驗的報告，PDF轉換由多個進程並行處理
+        
+        參數:
+            experiment_configs (list): 實驗列表，每項為字典，包含 experiment_name、results_data、config，
+                以及可選的 executor；提供 plots_data（和可選的 purpose）時同時生成詳細報告
+            max_workers (int): 並行進程數，默認為CPU核心數
+        
+        返回:
+            list: 每個實驗生成的報告路徑 [{"summary": str, "detailed": str}, ...]
+        """
+        # 同一批次的報告共用同一秒的時間戳，實驗名稱重複時文件路徑相同，會互相覆蓋
+        experiment_names = [experiment["experiment_name"] for experiment in experiment_configs]
+        duplicates = sorted({name for name in experiment_names if experiment_names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"批量生成的實驗名稱不能重複: {', '.join(duplicates)}")
+        
+        report_paths = []
+        pdf_jobs = []
+        
+        # Markdown渲染開銷較小，在主進程中依次完成
+        for experiment in experiment_configs:
+            executor = experiment.get("executor", "自動化系統")
+            paths = {}
             
-            # 轉換為HTML
-            html_content = markdown.markdown(
-                md_content,
-                extensions=['tables', 'fenced_code', 'codehilite']
+            md_path, pdf_path, report_content, pdf_cache = self._render_summary_report(
+                experiment["experiment_name"], experiment["results_data"], experiment["config"], executor
             )
+            paths["summary"] = str(md_path)
+            pdf_jobs.append((report_content, str(pdf_path), pdf_cache))
             
-            # 添加基本樣式
-            styled_html = f"""
-            <html>
-            <head>
-                <style>
-                    body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                    h1 {{ color: #2c3e50; }}
-                    h2 {{ color: #3498db; margin-top: 20px; }}
-                    h3 {{ color: #2980b9; }}
-                    table {{ border-collapse: collapse; width: 100%; margin: 20px 0; }}
-                    th, td {{ padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }}
-                    th {{ background-color: #f2f2f2; }}
-                    code {{ background: #f8f8f8; padding: 2px 5px; border-radius: 3px; }}
-                    pre {{ background: #f8f8f8; padding: 15px; border-radius: 5px; overflow-x: auto; }}
-                    img {{ max-width: 100%; height: auto; }}
-                </style>
-            </head>
-            <body>
-                {html_content}
-            </body>
-            </html>
-            """
+            if experiment.get("plots_data") is not None:
+                md_path, pdf_path, report_content, pdf_cache = self._render_detailed_report(
+                    experiment["experiment_name"], experiment["results_data"], experiment["config"],
+                    experiment["plots_data"], experiment.get("purpose", ""), executor
+                )
+                paths["detailed"] = str(md_path)
+                pdf_jobs.append((report_content, str(pdf_path), pdf_cache))
             
-            # 轉換為PDF
-            weasyprint.HTML(string=styled_html).write_pdf(pdf_path)
-            
-        except Exception as e:
-            print(f"PDF轉換錯誤: {str(e)}")
+            report_paths.append(paths)
+        
+        max_workers = min(max_workers or os.cpu_count() or 1, len(pdf_jobs))
+        if max_workers <= 1:
+            for job in pdf_jobs:
+                self._convert_md_to_pdf(*job)
+            return report_paths
+        
+        # PDF排版是主要耗時，分派到多個進程並行轉換
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_pdf_worker) as pool:
+            futures = [pool.submit(_convert_md_to_pdf_worker, *job) for job in pdf_jobs]
+            for future in futures:
+                future.result()
+        
+        return report_paths
+    
+    @staticmethod
+    def _dump_json(data):
+        """將結果數據序列化為縮排的UTF-8編碼JSON，優先使用orjson"""
+        if orjson is not None:
+            try:
+                return orjson.dumps(
+                    data,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+                )
+            except TypeError:
+                # orjson不支持的類型交由標準庫處理
+                pass
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    
+    def _convert_md_to_pdf(self, md_content, pdf_path, pdf_cache=None):
+        """將Markdown內容轉換為PDF"""
+        _write_pdf(self._md, self._font_config, self._report_css, md_content, pdf_path, pdf_cache)
     
     def _extract_config_summary(self, config):
         """從配置中提取摘要信息"""
@@ -275,9 +457,9 @@ class ReportGenerator:
         for stack_name, stack_config in config.get("stacks", {}).items():
             summary["stacks"][stack_name] = {
                 "description": stack_config.get("description", "無描述"),
-                "vad_method": stack_config.get("vad_method", {}).get("name", "無VAD方法"),
-                "feature_method": stack_config.get("feature_method", {}).get("name", "無特徵提取方法"),
-                "scoring_method": stack_config.get("scoring_method", {}).get("name", "無評分方法")
+                "vad_method": stack_config.get("vad_method", _EMPTY).get("name", "無VAD方法"),
+                "feature_method": stack_config.get("feature_method", _EMPTY).get("name", "無特徵提取方法"),
+                "scoring_method": stack_config.get("scoring_method", _EMPTY).get("name", "無評分方法")
             }
             
         return summary
@@ -295,52 +477,119 @@ class ReportGenerator:
 生成的特徵數: {summary.get('total_features_generated', '未知')}
         """
     
-    def _extract_stack_results(self, results_data):
-        """提取實驗堆疊結果"""
-        stacks_results = []
+    def _analyze_results(self, results_data, config=None, plots_data=None):
+        """
+        單次遍歷實驗堆疊結果，生成各報告章節所需的數據
+        
+        參數:
+            results_data (dict): 實驗結果數據
+            config (dict): 實驗配置（僅詳細報告需要）
+            plots_data (dict): 圖表數據路徑和描述（僅詳細報告需要，為None時不生成詳細堆疊結果）
+        
+        返回:
+            ResultsAnalysis: 分析結果
+        """
+        analysis = ResultsAnalysis()
         
         if not results_data or "stacks" not in results_data:
-            return stacks_results
-            
+            return analysis
+        
+        analysis.has_stacks = True
+        detailed = plots_data is not None
+        stacks_config = config.get("stacks", {}) if detailed else {}
+        metrics_comparison = analysis.metrics_comparison
+        
+        # 各堆疊的評分，遍歷結束後以向量化方式選出最佳堆疊
+        stack_names = []
+        stack_components = []
+        summary_scores = []
+        r2_scores = []
+        
         for stack_name, stack_data in results_data.get("stacks", {}).items():
-            stack_result = {
+            metrics = stack_data.get("metrics", {})
+            components = stack_data.get("components", {})
+            
+            analysis.stacks_summary.append({
                 "name": stack_name,
                 "description": stack_data.get("description", "無描述"),
-                "components": self._format_components(stack_data.get("components", {})),
-                "metrics": stack_data.get("metrics", {})
-            }
-            stacks_results.append(stack_result)
+                "components": self._format_components(components),
+                "metrics": metrics
+            })
+            
+            stack_names.append(stack_name)
+            stack_components.append(components)
+            # 假設主要評估指標是R²或相關性；詳細結論僅以R²排序
+            summary_scores.append(metrics.get("r2_score", metrics.get("correlation", 0)))
+            r2_scores.append(metrics.get("r2_score", 0))
+            
+            for metric_name, metric_value in metrics.items():
+                if metric_name not in metrics_comparison:
+                    metrics_comparison[metric_name] = []
+                
+                metrics_comparison[metric_name].append({
+                    "stack": stack_name,
+                    "value": metric_value
+                })
             
-        return stacks_results
+            if detailed:
+                stack_config = stacks_config.get(stack_name, {})
+                plot_info = plots_data.get(stack_name, _EMPTY)
+                
+                analysis.detailed_stacks.append({
+                    "name": stack_name,
+                    "config": yaml.dump(stack_config, Dumper=YamlDumper, default_flow_style=False, allow_unicode=True),
+                    "process_description": self._generate_process_description(stack_data, stack_config),
+                    "metrics": metrics,
+                    "plot_descriptions": plot_info.get("description", "無圖表描述"),
+                    "plot_path": plot_info.get("path", "")
+                })
+        
+        best_idx = self._argmax_score(summary_scores)
+        if best_idx is not None:
+            analysis.best_stack = stack_names[best_idx]
+            analysis.best_score = summary_scores[best_idx]
+        
+        best_idx = self._argmax_score(r2_scores)
+        if best_idx is not None:
+            analysis.best_r2_stack = stack_names[best_idx]
+            analysis.best_r2_score = r2_scores[best_idx]
+            analysis.best_components = stack_components[best_idx]
+        
+        return analysis
+    
+    @staticmethod
+    def _argmax_score(scores):
+        """返回最高分的索引（同分取第一個，NaN不參與比較），沒有有效分數時返回None"""
+        if not scores:
+            return None
+        
+        import numpy as np
+        values = np.fromiter(scores, dtype=np.float64, count=len(scores))
+        values[np.isnan(values)] = -np.inf
+        best_idx = int(values.argmax())
+        
+        if values[best_idx] == -np.inf:
+            return None
+        return best_idx
     
     def _format_components(self, components):
         """格式化組件信息"""
         if not components:
             return "無組件信息"
             
-        result = []
-        for component_type, component_data in components.items():
-            result.append(f"{component_type}: {component_data.get('name', '未知')}")
-            
-        return ", ".join(result)
+        return ", ".join([
+            f"{component_type}: {component_data.get('name', '未知')}"
+            for component_type, component_data in components.items()
+        ])
     
-    def _generate_conclusion(self, results_data):
+    def _generate_conclusion(self, analysis):
         """生成結論"""
-        if not results_data or "stacks" not in results_data:
+        if not analysis.has_stacks:
             return "無數據可用於得出結論"
             
-        # 尋找最佳性能的堆疊
-        best_stack = None
-        best_score = float('-inf')
-        
-        for stack_name, stack_data in results_data.get("stacks", {}).items():
-            metrics = stack_data.get("metrics", {})
-            # 假設主要評估指標是R²或相關性
-            score = metrics.get("r2_score", metrics.get("correlation", 0))
-            
-            if score > best_score:
-                best_score = score
-                best_stack = stack_name
+        # 最佳性能的堆疊已在遍歷結果時確定
+        best_stack = analysis.best_stack
+        best_score = analysis.best_score
         
         if best_stack:
             return f"""
@@ -367,43 +616,18 @@ class ReportGenerator:
 窗口移動步長: {global_params.get("window_step", "未指定")} ms
         """
     
-    def _extract_detailed_stack_results(self, results_data, config, plots_data):
-        """提取詳細的實驗堆疊結果"""
-        detailed_stacks = []
-        
-        if not results_data or "stacks" not in results_data:
-            return detailed_stacks
-            
-        stacks_config = config.get("stacks", {})
-        
-        for stack_name, stack_data in results_data.get("stacks", {}).items():
-            stack_config = stacks_config.get(stack_name, {})
-            
-            detailed_stack = {
-                "name": stack_name,
-                "config": yaml.dump(stack_config, default_flow_style=False, allow_unicode=True),
-                "process_description": self._generate_process_description(stack_data, stack_config),
-                "metrics": stack_data.get("metrics", {}),
-                "plot_descriptions": plots_data.get(stack_name, {}).get("description", "無圖表描述"),
-                "plot_path": plots_data.get(stack_name, {}).get("path", "")
-            }
-            
-            detailed_stacks.append(detailed_stack)
-            
-        return detailed_stacks
-    
     def _generate_process_description(self, stack_data, stack_config):
         """生成處理流程描述"""
         components = stack_data.get("components", {})
         
-        vad_method = components.get("vad", {}).get("name", "未知VAD方法")
-        vad_params = stack_config.get("vad_method", {}).get("params", {})
+        vad_method = components.get("vad", _EMPTY).get("name", "未知VAD方法")
+        vad_params = stack_config.get("vad_method", _EMPTY).get("params", {})
         
-        feature_method = components.get("feature", {}).get("name", "未知特徵提取方法")
-        feature_params = stack_config.get("feature_method", {}).get("params", {})
+        feature_method = components.get("feature", _EMPTY).get("name", "未知特徵提取方法")
+        feature_params = stack_config.get("feature_method", _EMPTY).get("params", {})
         
-        scoring_method = components.get("scoring", {}).get("name", "未知評分方法")
-        scoring_params = stack_config.get("scoring_method", {}).get("params", {})
+        scoring_method = components.get("scoring", _EMPTY).get("name", "未知評分方法")
+        scoring_params = stack_config.get("scoring_method", _EMPTY).get("params", {})
         
         return f"""
 此實驗堆疊使用了以下處理流程:
@@ -428,81 +652,50 @@ class ReportGenerator:
    - 測試樣本數: {stack_data.get("test_samples_count", "未知")}
         """
     
-    def _generate_comparison_analysis(self, results_data):
+    def _generate_comparison_analysis(self, analysis):
         """生成比較分析"""
-        if not results_data or "stacks" not in results_data:
+        if not analysis.has_stacks:
             return "無法進行比較分析，數據不足"
             
-        # 提取評估指標進行比較
-        metrics_comparison = {}
+        # 各評估指標的比較數據已在遍歷結果時收集
+        metrics_comparison = analysis.metrics_comparison
         
-        for stack_name, stack_data in results_data.get("stacks", {}).items():
-            metrics = stack_data.get("metrics", {})
-            
-            for metric_name, metric_value in metrics.items():
-                if metric_name not in metrics_comparison:
-                    metrics_comparison[metric_name] = []
-                    
-                metrics_comparison[metric_name].append({
-                    "stack": stack_name,
-                    "value": metric_value
-                })
-        
-        # 生成比較結果
-        comparison_text = "## 各堆疊評估指標比較\n\n"
+        # 生成比較結果（先收集片段，最後一次性拼接）
+        parts = ["## 各堆疊評估指標比較\n\n"]
         
         for metric_name, values in metrics_comparison.items():
             # 按指標值排序
-            sorted_values = sorted(values, key=lambda x: x["value"], reverse=True)
+            sorted_values = sorted(values, key=itemgetter("value"), reverse=True)
             
-            comparison_text += f"### {metric_name}\n\n"
-            comparison_text += "| 堆疊 | 指標值 |\n"
-            comparison_text += "| --- | --- |\n"
+            parts.append(f"### {metric_name}\n\n")
+            parts.extend(["| 堆疊 | 指標值 |\n", "| --- | --- |\n"])
             
-            for item in sorted_values:
-                comparison_text += f"| {item['stack']} | {item['value']:.4f} |\n"
-                
-            comparison_text += "\n"
+            parts.extend([f"| {item['stack']} | {item['value']:.4f} |\n" for item in sorted_values])
+            parts.append("\n")
         
-        return comparison_text
+        return "".join(parts)
     
-    def _generate_detailed_conclusion(self, results_data):
+    def _generate_detailed_conclusion(self, analysis):
         """生成詳細結論"""
-        if not results_data or "stacks" not in results_data:
+        if not analysis.has_stacks:
             return "無數據可用於得出結論"
             
-        # 尋找最佳性能的堆疊及其組件
-        metrics_by_stack = {}
-        components_by_stack = {}
-        
-        for stack_name, stack_data in results_data.get("stacks", {}).items():
-            metrics = stack_data.get("metrics", {})
-            components = stack_data.get("components", {})
-            
-            # 假設主要評估指標是R²
-            r2_score = metrics.get("r2_score", 0)
-            metrics_by_stack[stack_name] = r2_score
-            components_by_stack[stack_name] = components
-        
-        # 按R²排序堆疊
-        sorted_stacks = sorted(metrics_by_stack.items(), key=lambda x: x[1], reverse=True)
-        
-        # 分析最佳組件組合
-        best_stack = sorted_stacks[0][0] if sorted_stacks else None
+        # 按R²選出的最佳堆疊及其組件已在遍歷結果時確定
+        best_stack = analysis.best_r2_stack
         
         if not best_stack:
             return "實驗結果無法確定最佳堆疊，建議檢查評估指標的計算方法或重新設計實驗。"
             
-        best_components = components_by_stack.get(best_stack, {})
-        best_vad = best_components.get("vad", {}).get("name", "未知")
-        best_feature = best_components.get("feature", {}).get("name", "未知")
-        best_scoring = best_components.get("scoring", {}).get("name", "未知")
+        best_components = analysis.best_components
+        best_vad = best_components.get("vad", _EMPTY).get("name", "未知")
+        best_feature = best_components.get("feature", _EMPTY).get("name", "未知")
+        best_scoring = best_components.get("scoring", _EMPTY).get("name", "未知")
         
         # 生成結論
         conclusion = f"""
 ## 綜合結論
 
-基於實驗結果分析，堆疊 "{best_stack}" 表現最佳，其R²得分為 {metrics_by_stack[best_stack]:.4f}。
+基於實驗結果分析，堆疊 "{best_stack}" 表現最佳，其R²得分為 {analysis.best_r2_score:.4f}。
 
 ### 最佳組件組合:
 - VAD方法: {best_vad}
@@ -522,4 +715,13 @@ class ReportGenerator:
 - 開發集成方法將多個模型結果融合
         """
         
-        return conclusion 
\ No newline at end of file
+        return conclusion 
+
+
+if __name__ == "__main__":
+    # 將默認模板寫入指定的模板目錄: python utils/report_utils.py [template_dir]
+    import sys
+    
+    template_dir = sys.argv[1] if len(sys.argv) > 1 else "./utils/templates"
+    ReportGenerator._create_default_templates(template_dir)
+    print(f"默認模板已寫入: {template_dir}")
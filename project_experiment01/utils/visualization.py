@@ -1,13 +1,68 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import os
+import functools
 import numpy as np
-import matplotlib.pyplot as plt
 import matplotlib
-matplotlib.use('Agg')  # 非互動式後端
-import seaborn as sns
-from sklearn.metrics import mean_absolute_error, r2_score
-import os
+if not os.environ.get('MPLBACKEND'):
+    matplotlib.use('Agg')  # 非互動式後端，需在導入pyplot之前設置；可用MPLBACKEND覆蓋
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+
+# 點數超過此閾值時以六邊形分箱圖代替散點
+HEXBIN_THRESHOLD = 50000
+
+# 與seaborn "whitegrid" 樣式相同的rcParams，避免僅為設置樣式而在導入時載入seaborn
+# （不含依賴seaborn註冊顏色映射的image.cmap）
+_WHITEGRID_RC = {
+    'axes.axisbelow': True,
+    'axes.edgecolor': '.8',
+    'axes.facecolor': 'white',
+    'axes.grid': True,
+    'axes.labelcolor': '.15',
+    'axes.spines.bottom': True,
+    'axes.spines.left': True,
+    'axes.spines.right': True,
+    'axes.spines.top': True,
+    'figure.facecolor': 'white',
+    'font.family': ['sans-serif'],
+    'font.sans-serif': ['Arial', 'DejaVu Sans', 'Liberation Sans', 'Bitstream Vera Sans', 'sans-serif'],
+    'grid.color': '.8',
+    'grid.linestyle': '-',
+    'lines.solid_capstyle': 'round',
+    'patch.edgecolor': 'w',
+    'patch.force_edgecolor': True,
+    'text.color': '.15',
+    'xtick.bottom': False,
+    'xtick.color': '.15',
+    'xtick.direction': 'out',
+    'xtick.top': False,
+    'ytick.color': '.15',
+    'ytick.direction': 'out',
+    'ytick.left': False,
+    'ytick.right': False,
+}
+
+
+def _gated(name, skipped=None):
+    """
+    繪圖方法的開關裝飾器：設置環境變量 SKIP_PLOT_<name>（非空且非"0"）時跳過繪圖並返回skipped
+    
+    參數:
+        name (str): 圖形類型名稱，例如 "SCATTER"
+        skipped: 跳過時的返回值，應與方法正常返回值的結構一致（例如返回兩個路徑的方法為 (None, None)）
+    """
+    env_key = f'SKIP_PLOT_{name}'
+    
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            if os.environ.get(env_key, '') not in ('', '0'):
+                return skipped
+            return fn(self, *args, **kwargs)
+        return wrapper
+    return decorator
 
 
 class PlotResults:
@@ -16,7 +71,7 @@ class PlotResults:
     def __init__(self):
         """初始化繪圖樣式"""
         # 設置繪圖樣式
-        sns.set_style("whitegrid")
+        plt.rcParams.update(_WHITEGRID_RC)
         plt.rcParams.update({
             'font.size': 12,
             'axes.titlesize': 14,
@@ -26,8 +81,96 @@ class PlotResults:
             'legend.fontsize': 10,
             'figure.figsize': (10, 6)
         })
+        
+        # 輸出分辨率，預設100dpi供監控查看，出版品質可設置環境變量PLOT_DPI=300
+        self.dpi = int(os.environ.get('PLOT_DPI', 100))
+        
+        # 固定尺寸的圖共用同一個Figure/Axes，首次繪圖時建立
+        self._fig = None
+        self._ax = None
+        
+        # 漸變顏色緩存 {(顏色映射名稱, 數量): RGBA數組}
+        self._color_cache = {}
+        
+        # Bland-Altman圖的差異/平均值緩衝區（2 x 最大點數），按需擴大
+        self._ba_buf = None
+    
+    def _colors(self, cmap_name, n):
+        """
+        取得顏色映射上均勻分佈的n個顏色，結果按(名稱, 數量)緩存
+        
+        參數:
+            cmap_name (str): matplotlib顏色映射名稱
+            n (int): 顏色數量
+        
+        返回:
+            numpy.ndarray: 形狀為(n, 4)的唯讀RGBA數組
+        """
+        key = (cmap_name, n)
+        colors = self._color_cache.get(key)
+        if colors is None:
+            colors = plt.get_cmap(cmap_name)(np.linspace(0, 1, n))
+            colors.setflags(write=False)
+            self._color_cache[key] = colors
+        return colors
+    
+    def _get_axes(self, figsize):
+        """
+        取得重複使用的Axes，並清空上一次繪製的內容
+        
+        Figure不經由pyplot建立，不會計入pyplot打開的圖形，也不會成為當前圖形
+        
+        參數:
+            figsize (tuple): 圖形尺寸（英寸）
+        
+        返回:
+            matplotlib.axes.Axes: 已清空的繪圖軸
+        """
+        if self._fig is None:
+            self._fig = Figure(figsize=figsize)
+            self._ax = self._fig.add_subplot()
+        else:
+            self._ax.clear()
+            self._fig.set_size_inches(figsize)
+        return self._ax
+    
+    @staticmethod
+    def _subsample(*arrs, n=20000):
+        """
+        點數超過n時對多個等長數組做相同的隨機抽樣（固定種子，結果可重現）
+        
+        參數:
+            *arrs (numpy.ndarray): 等長數組
+            n (int): 最大保留點數
+        
+        返回:
+            tuple: 抽樣後的數組
+        """
+        if not n or len(arrs[0]) <= n:
+            return arrs
+        idx = np.random.default_rng(0).choice(len(arrs[0]), n, replace=False)
+        return tuple(a[idx] for a in arrs)
     
-    def plot_scatter(self, system_scores, azure_scores, output_path, title=None):
+    def _scatter_points(self, ax, x, y, max_points=20000):
+        """
+        繪製點雲：散點以柵格方式渲染，點數過多時改用六邊形分箱圖
+        
+        參數:
+            ax (matplotlib.axes.Axes): 繪圖軸
+            x (numpy.ndarray): x座標
+            y (numpy.ndarray): y座標
+            max_points (int): 散點最大繪製點數，超過時隨機抽樣
+        """
+        if len(x) > HEXBIN_THRESHOLD:
+            # 分箱圖本身即為聚合，使用完整數據
+            ax.hexbin(x, y, gridsize=80, cmap='Blues', mincnt=1)
+        else:
+            x, y = self._subsample(x, y, n=max_points)
+            ax.scatter(x, y, alpha=0.6, s=15, rasterized=True)
+    
+    @_gated('SCATTER')
+    def plot_scatter(self, system_scores, azure_scores, output_path, title=None,
+                     max_points=20000):
         """
         繪製系統分數與Azure分數的散點圖
         
@@ -36,45 +179,60 @@ class PlotResults:
             azure_scores (numpy.ndarray): Azure參考分數
             output_path (str): 輸出圖片路徑
             title (str, optional): 圖片標題
+            max_points (int): 散點最大繪製點數，統計量仍以完整數據計算
         """
+        system_scores = np.asarray(system_scores, dtype=np.float64)
+        azure_scores = np.asarray(azure_scores, dtype=np.float64)
+        
         # 計算相關指標
-        mae = mean_absolute_error(azure_scores, system_scores)
-        r2 = r2_score(azure_scores, system_scores)
-        corr = np.corrcoef(system_scores, azure_scores)[0, 1]
+        diff = system_scores - azure_scores
+        mae = np.abs(diff).mean()
+        ss_res = np.dot(diff, diff)
+        azure_centered = azure_scores - azure_scores.mean()
+        ss_tot = np.dot(azure_centered, azure_centered)
+        # 參考分數為常數時與sklearn的r2_score一致：完全吻合為1，否則為0
+        r2 = 1.0 - ss_res / ss_tot if ss_tot > 0 else float(ss_res == 0)
+        # Pearson相關係數，重用已中心化的參考分數
+        system_centered = system_scores - system_scores.mean()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.dot(system_centered, azure_centered) / np.sqrt(
+                np.dot(system_centered, system_centered) * ss_tot)
         
         # 創建散點圖
-        plt.figure(figsize=(10, 8))
+        ax = self._get_axes((10, 8))
         
         # 散點圖
-        sns.scatterplot(x=azure_scores, y=system_scores, alpha=0.6)
+        self._scatter_points(ax, azure_scores, system_scores, max_points)
         
-        # 添加回歸線
-        sns.regplot(x=azure_scores, y=system_scores, scatter=False, 
-                   line_kws={"color": "red", "lw": 2})
+        # 添加回歸線（最小二乘直線擬合）
+        slope, intercept = np.polyfit(azure_scores, system_scores, 1)
+        xs = np.array([azure_scores.min(), azure_scores.max()])
+        ax.plot(xs, slope * xs + intercept, color='red', lw=2)
         
         # 添加對角線（理想情況）
-        min_val = min(min(azure_scores), min(system_scores))
-        max_val = max(max(azure_scores), max(system_scores))
-        plt.plot([min_val, max_val], [min_val, max_val], 'k--', alpha=0.5, label='理想情況')
+        min_val = float(min(azure_scores.min(), system_scores.min()))
+        max_val = float(max(azure_scores.max(), system_scores.max()))
+        ax.plot([min_val, max_val], [min_val, max_val], 'k--', alpha=0.5, label='理想情況')
         
         # 設置標題和標籤
-        plt.title(title or '系統分數 vs Azure分數比較')
-        plt.xlabel('Azure分數')
-        plt.ylabel('系統分數')
+        ax.set_title(title or '系統分數 vs Azure分數比較')
+        ax.set_xlabel('Azure分數')
+        ax.set_ylabel('系統分數')
         
         # 添加統計信息
-        plt.annotate(f'MAE: {mae:.4f}\nR²: {r2:.4f}\nCorr: {corr:.4f}',
+        ax.annotate(f'MAE: {mae:.4f}\nR²: {r2:.4f}\nCorr: {corr:.4f}',
                     xy=(0.05, 0.95), xycoords='axes fraction',
                     bbox=dict(boxstyle="round,pad=0.3", fc="white", ec="gray", alpha=0.8),
                     ha='left', va='top')
         
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=300)
-        plt.close()
+        self._fig.tight_layout()
+        self._fig.savefig(output_path, dpi=self.dpi)
         
         return output_path
     
-    def plot_residuals(self, system_scores, azure_scores, output_path, title=None):
+    @_gated('RESIDUALS')
+    def plot_residuals(self, system_scores, azure_scores, output_path, title=None,
+                       max_points=20000):
         """
         繪製殘差圖
         
@@ -83,44 +241,49 @@ class PlotResults:
             azure_scores (numpy.ndarray): Azure參考分數
             output_path (str): 輸出圖片路徑
             title (str, optional): 圖片標題
+            max_points (int): 散點最大繪製點數，統計量仍以完整數據計算
         """
+        system_scores = np.asarray(system_scores, dtype=np.float64)
+        azure_scores = np.asarray(azure_scores, dtype=np.float64)
+        
         # 計算殘差
         residuals = system_scores - azure_scores
         
         # 創建殘差圖
-        plt.figure(figsize=(10, 8))
+        ax = self._get_axes((10, 8))
         
         # 散點圖
-        sns.scatterplot(x=azure_scores, y=residuals, alpha=0.6)
+        self._scatter_points(ax, azure_scores, residuals, max_points)
         
         # 添加水平線 (y=0)
-        plt.axhline(y=0, color='r', linestyle='-', alpha=0.3)
+        ax.axhline(y=0, color='r', linestyle='-', alpha=0.3)
         
-        # 添加趨勢線
-        sns.regplot(x=azure_scores, y=residuals, scatter=False, 
-                    line_kws={"color": "green", "lw": 2})
+        # 添加趨勢線（最小二乘直線擬合）
+        slope, intercept = np.polyfit(azure_scores, residuals, 1)
+        xs = np.array([azure_scores.min(), azure_scores.max()])
+        ax.plot(xs, slope * xs + intercept, color='green', lw=2)
         
         # 設置標題和標籤
-        plt.title(title or '分數殘差分析')
-        plt.xlabel('Azure分數')
-        plt.ylabel('殘差 (系統分數 - Azure分數)')
+        ax.set_title(title or '分數殘差分析')
+        ax.set_xlabel('Azure分數')
+        ax.set_ylabel('殘差 (系統分數 - Azure分數)')
         
         # 計算統計數據
         mean_residual = np.mean(residuals)
         std_residual = np.std(residuals)
         
         # 添加統計信息
-        plt.annotate(f'平均殘差: {mean_residual:.4f}\n標準差: {std_residual:.4f}',
+        ax.annotate(f'平均殘差: {mean_residual:.4f}\n標準差: {std_residual:.4f}',
                     xy=(0.05, 0.95), xycoords='axes fraction',
                     bbox=dict(boxstyle="round,pad=0.3", fc="white", ec="gray", alpha=0.8),
                     ha='left', va='top')
         
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=300)
-        plt.close()
+        self._fig.tight_layout()
+        self._fig.savefig(output_path, dpi=self.dpi)
         
         return output_path
     
+    @_gated('FEATURE_IMPORTANCE')
     def plot_feature_importance(self, feature_importance, output_path, 
                                title=None, top_n=20):
         """
@@ -132,28 +295,33 @@ class PlotResults:
             title (str, optional): 圖片標題
             top_n (int): 顯示前n個重要特徵
         """
-        # 將字典轉換為排序列表
-        importance_items = sorted(feature_importance.items(), 
-                                 key=lambda x: x[1], reverse=True)
-        
-        # 取前N個重要特徵
-        if top_n and len(importance_items) > top_n:
-            importance_items = importance_items[:top_n]
-        
-        # 分離特徵名稱和重要性值
-        features = [item[0] for item in importance_items]
-        importances = [item[1] for item in importance_items]
+        # 分離特徵名稱和重要性值（重要性直接讀入float64數組，不建立中間的Python浮點列表）
+        names = list(feature_importance)
+        values = np.fromiter(feature_importance.values(), dtype=np.float64, count=len(names))
+        
+        # 取前N個重要特徵（線性時間選出前N個，只對選中的部分排序）
+        if top_n and len(values) > top_n:
+            idx = np.argpartition(-values, top_n - 1)[:top_n]
+            cutoff = values[idx].min()
+            if np.count_nonzero(values == cutoff) > np.count_nonzero(values[idx] == cutoff):
+                # 截斷處的並列值未全部選中時，argpartition選出哪些並列特徵不確定，
+                # 改用穩定排序，與原先一樣保留字典順序靠前的特徵
+                idx = np.argsort(-values, kind='stable')[:top_n]
+            else:
+                idx.sort()  # 恢復原始順序，使選中部分內並列值的排序與字典順序一致
+        else:
+            idx = np.arange(len(values))
+        idx = idx[np.argsort(-values[idx], kind='stable')]
+        
+        features = [names[i] for i in idx]
+        importances = values[idx]
         
         # 創建水平條形圖
         plt.figure(figsize=(12, max(6, len(features) * 0.3)))
         
-        # 繪製條形圖
-        bars = plt.barh(features, importances, alpha=0.8)
-        
-        # 設置漸變顏色
-        colors = plt.cm.viridis(np.linspace(0, 1, len(features)))
-        for i, bar in enumerate(bars):
-            bar.set_color(colors[i])
+        # 繪製條形圖（漸變顏色一次傳入）
+        colors = self._colors('viridis', len(features))
+        plt.barh(features, importances, color=colors, alpha=0.8)
         
         # 設置標題和標籤
         plt.title(title or '特徵重要性分析')
@@ -163,12 +331,14 @@ class PlotResults:
         # 調整圖的格式
         plt.gca().invert_yaxis()  # 從上到下顯示重要性降序
         plt.tight_layout()
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
+        plt.savefig(output_path, dpi=self.dpi)
         plt.close()
         
         return output_path
     
-    def plot_bland_altman(self, system_scores, azure_scores, output_path, title=None):
+    @_gated('BLAND_ALTMAN')
+    def plot_bland_altman(self, system_scores, azure_scores, output_path, title=None,
+                          max_points=20000):
         """
         繪製Bland-Altman圖（一致性分析）
         
@@ -177,52 +347,64 @@ class PlotResults:
             azure_scores (numpy.ndarray): Azure參考分數
             output_path (str): 輸出圖片路徑
             title (str, optional): 圖片標題
+            max_points (int): 散點最大繪製點數，統計量仍以完整數據計算
         """
-        # 計算差異和平均值
-        diff = system_scores - azure_scores
-        mean = np.mean([system_scores, azure_scores], axis=0)
-        
-        # 計算平均差異和標準差
+        system_scores = np.asarray(system_scores, dtype=np.float64)
+        azure_scores = np.asarray(azure_scores, dtype=np.float64)
+        
+        # 計算差異和平均值（寫入重複使用的緩衝區）
+        n = len(system_scores)
+        if self._ba_buf is None or self._ba_buf.shape[1] < n:
+            self._ba_buf = np.empty((2, n), dtype=np.float64)
+        diff = self._ba_buf[0, :n]
+        mean = self._ba_buf[1, :n]
+        np.subtract(system_scores, azure_scores, out=diff)
+        np.add(system_scores, azure_scores, out=mean)
+        mean *= 0.5
+        
+        # 計算平均差異和標準差，以及±1.96SD界限
         md = np.mean(diff)
         sd = np.std(diff)
+        half_width = 1.96 * sd
+        lower, upper = md - half_width, md + half_width
         
         # 創建圖形
-        plt.figure(figsize=(10, 8))
+        ax = self._get_axes((10, 8))
         
         # 散點圖
-        plt.scatter(mean, diff, alpha=0.6)
+        self._scatter_points(ax, mean, diff, max_points)
         
         # 添加平均線和±1.96SD線
-        plt.axhline(md, color='blue', linestyle='-', label=f'平均差異: {md:.4f}')
-        plt.axhline(md + 1.96 * sd, color='red', linestyle='--', 
-                   label=f'+1.96 SD: {md + 1.96*sd:.4f}')
-        plt.axhline(md - 1.96 * sd, color='red', linestyle='--', 
-                   label=f'-1.96 SD: {md - 1.96*sd:.4f}')
+        ax.axhline(md, color='blue', linestyle='-', label=f'平均差異: {md:.4f}')
+        ax.axhline(upper, color='red', linestyle='--', 
+                   label=f'+1.96 SD: {upper:.4f}')
+        ax.axhline(lower, color='red', linestyle='--', 
+                   label=f'-1.96 SD: {lower:.4f}')
         
         # 設置標題和標籤
-        plt.title(title or 'Bland-Altman 一致性分析')
-        plt.xlabel('測量平均值 ((系統 + Azure) / 2)')
-        plt.ylabel('測量差異 (系統 - Azure)')
-        plt.legend(loc='best')
+        ax.set_title(title or 'Bland-Altman 一致性分析')
+        ax.set_xlabel('測量平均值 ((系統 + Azure) / 2)')
+        ax.set_ylabel('測量差異 (系統 - Azure)')
+        ax.legend(loc='best')
         
         # 計算落在±1.96SD範圍內的百分比
-        within_limits = ((diff >= md - 1.96 * sd) & (diff <= md + 1.96 * sd)).sum()
+        within_limits = np.count_nonzero((diff >= lower) & (diff <= upper))
         percentage = (within_limits / len(diff)) * 100
         
         # 添加統計信息
-        plt.annotate(f'95%置信區間內: {percentage:.1f}%\n'
+        ax.annotate(f'95%置信區間內: {percentage:.1f}%\n'
                     f'平均差異: {md:.4f}\n'
                     f'標準差: {sd:.4f}',
                     xy=(0.05, 0.05), xycoords='axes fraction',
                     bbox=dict(boxstyle="round,pad=0.3", fc="white", ec="gray", alpha=0.8),
                     ha='left', va='bottom')
         
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=300)
-        plt.close()
+        self._fig.tight_layout()
+        self._fig.savefig(output_path, dpi=self.dpi)
         
         return output_path
     
+    @_gated('SEGMENTATION')
     def plot_segmentation_comparison(self, vad_segments, reference_segments, 
                                     audio_length, output_path, title=None):
         """
@@ -235,60 +417,59 @@ class PlotResults:
             output_path (str): 輸出圖片路徑
             title (str, optional): 圖片標題
         """
-        plt.figure(figsize=(12, 6))
+        ax = self._get_axes((12, 6))
         
         # 繪製參考分割
         for i, (start, end) in enumerate(reference_segments):
-            plt.plot([start, end], [1, 1], 'g-', linewidth=5, solid_capstyle='butt', 
+            ax.plot([start, end], [1, 1], 'g-', linewidth=5, solid_capstyle='butt', 
                      label='參考分割' if i == 0 else "")
         
         # 繪製VAD分割
         for i, (start, end) in enumerate(vad_segments):
-            plt.plot([start, end], [0.5, 0.5], 'r-', linewidth=5, solid_capstyle='butt', 
+            ax.plot([start, end], [0.5, 0.5], 'r-', linewidth=5, solid_capstyle='butt', 
                      label='VAD分割' if i == 0 else "")
         
-        # 計算重疊區域
-        overlaps = []
-        for ref_start, ref_end in reference_segments:
-            for vad_start, vad_end in vad_segments:
-                overlap_start = max(ref_start, vad_start)
-                overlap_end = min(ref_end, vad_end)
-                
-                if overlap_end > overlap_start:
-                    overlaps.append((overlap_start, overlap_end))
+        # 計算重疊區域（以廣播一次比較所有參考/VAD區段對）
+        ref = np.asarray(reference_segments, dtype=np.float64).reshape(-1, 2)
+        vad = np.asarray(vad_segments, dtype=np.float64).reshape(-1, 2)
+        overlap_starts = np.maximum(ref[:, 0:1], vad[None, :, 0])
+        overlap_ends = np.minimum(ref[:, 1:2], vad[None, :, 1])
+        mask = overlap_ends > overlap_starts
+        overlaps = np.stack([overlap_starts[mask], overlap_ends[mask]], axis=1)
         
         # 繪製重疊區域
         for i, (start, end) in enumerate(overlaps):
-            plt.plot([start, end], [0.75, 0.75], 'b-', linewidth=5, solid_capstyle='butt', 
+            ax.plot([start, end], [0.75, 0.75], 'b-', linewidth=5, solid_capstyle='butt', 
                     label='重疊區域' if i == 0 else "")
         
         # 設置圖形參數
-        plt.yticks([0.5, 0.75, 1], ['VAD', '重疊', '參考'])
-        plt.xlim(0, audio_length)
-        plt.ylim(0, 1.5)
-        plt.xlabel('時間 (秒)')
-        plt.title(title or 'VAD分割與參考分割比較')
-        plt.legend(loc='upper right')
+        ax.set_yticks([0.5, 0.75, 1])
+        ax.set_yticklabels(['VAD', '重疊', '參考'])
+        ax.set_xlim(0, audio_length)
+        ax.set_ylim(0, 1.5)
+        ax.set_xlabel('時間 (秒)')
+        ax.set_title(title or 'VAD分割與參考分割比較')
+        ax.legend(loc='upper right')
         
         # 計算覆蓋率
-        ref_total = sum(end - start for start, end in reference_segments)
-        overlap_total = sum(end - start for start, end in overlaps)
+        ref_total = (ref[:, 1] - ref[:, 0]).sum()
+        overlap_total = (overlaps[:, 1] - overlaps[:, 0]).sum()
         coverage = overlap_total / ref_total * 100 if ref_total > 0 else 0
         
         # 添加統計信息
-        plt.annotate(f'參考區段: {len(reference_segments)}\n'
+        ax.annotate(f'參考區段: {len(reference_segments)}\n'
                     f'VAD區段: {len(vad_segments)}\n'
                     f'重疊覆蓋率: {coverage:.1f}%',
                     xy=(0.02, 0.95), xycoords='axes fraction',
                     bbox=dict(boxstyle="round,pad=0.3", fc="white", ec="gray", alpha=0.8),
                     ha='left', va='top')
         
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=300)
-        plt.close()
+        self._fig.tight_layout()
+        self._fig.savefig(output_path, dpi=self.dpi)
         
         return output_path
     
+    @_gated('METRICS')
     def plot_metrics_comparison(self, metrics_dict, output_path, title=None, 
                               sort_by=None, ascending=False):
         """
@@ -302,6 +483,8 @@ class PlotResults:
             ascending (bool): 是否升序排序
         """
         # 轉換為DataFrame
+        import pandas as pd
+        
         df = pd.DataFrame.from_dict(metrics_dict, orient='index')
         
         # 排序（如果指定）
@@ -317,18 +500,13 @@ class PlotResults:
             axes = [axes]
         
         # 繪製每個指標的條形圖
+        colors = self._colors('viridis', len(df))
         for i, metric in enumerate(df.columns):
             ax = axes[i]
-            colors = plt.cm.viridis(np.linspace(0, 1, len(df)))
-            bars = ax.bar(df.index, df[metric], alpha=0.7)
-            
-            # 為每個條形設置顏色
-            for j, bar in enumerate(bars):
-                bar.set_color(colors[j])
+            bars = ax.bar(df.index, df[metric], color=colors, alpha=0.7)
                 
             # 在條形上方添加數值標籤
-            for j, value in enumerate(df[metric]):
-                ax.text(j, value, f'{value:.3f}', ha='center', va='bottom')
+            ax.bar_label(bars, fmt='%.3f', padding=2)
             
             ax.set_title(f'{metric} 比較')
             ax.set_ylabel(metric)
@@ -337,11 +515,12 @@ class PlotResults:
         # 設置整體標題
         fig.suptitle(title or 'Stack評估指標比較', fontsize=16)
         plt.tight_layout(rect=[0, 0, 1, 0.97])  # 為整體標題留出空間
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
+        plt.savefig(output_path, dpi=self.dpi)
         plt.close()
         
         return output_path
     
+    @_gated('CORRELATION', skipped=(None, None))
     def plot_correlation_matrix(self, features, labels, feature_names, output_path, title=None):
         """
         繪製特徵與目標的相關矩陣
@@ -353,73 +532,71 @@ class PlotResults:
             output_path (str): 輸出圖片路徑
             title (str, optional): 圖片標題
         """
+        import seaborn as sns
+        
         # 將特徵和標籤合併為一個矩陣
-        data = np.column_stack([features, labels])
+        data = np.column_stack([features, labels]).astype(np.float64, copy=False)
         
         # 創建列名，添加目標列
         columns = feature_names + ['目標分數']
         
-        # 計算相關矩陣
-        corr_matrix = np.corrcoef(data, rowvar=False)
+        # 計算相關矩陣：就地標準化各列後以一次矩陣乘法求得，目標相關性直接取自最後一行
+        data -= data.mean(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            data /= data.std(axis=0)  # 常數列與np.corrcoef一樣得到NaN
+        corr_matrix = np.clip(data.T @ data / data.shape[0], -1.0, 1.0)
         
-        # 創建熱力圖
-        plt.figure(figsize=(12, 10))
+        # 創建熱力圖（兩張圖共用同一個Figure）
+        fig = plt.figure(figsize=(12, 10))
+        ax = fig.add_subplot()
+        # 上三角（含對角線）設為NaN，由顏色映射的bad顏色顯示為白色
         mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
+        display = np.where(mask, np.nan, corr_matrix)
         
-        # 創建自定義顏色映射
+        # 創建自定義顏色映射（每次調用都是新對象，可直接修改）
         cmap = sns.diverging_palette(220, 10, as_cmap=True)
+        cmap.set_bad('white')
         
         # 繪製熱力圖
-        sns.heatmap(corr_matrix, mask=mask, cmap=cmap, vmax=1, vmin=-1, center=0,
-                   square=True, linewidths=.5, cbar_kws={"shrink": .5}, 
-                   annot=False)
+        im = ax.imshow(display, cmap=cmap, vmin=-1, vmax=1)
+        fig.colorbar(im, ax=ax, shrink=.5)
+        ax.grid(False)
         
         # 設置標題和標籤
-        plt.title(title or '特徵相關性矩陣')
+        ax.set_title(title or '特徵相關性矩陣')
         
         # 保存圖片
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
+        fig.savefig(output_path, dpi=self.dpi)
         
         # 另外創建一個與目標分數的相關性圖
         target_corr = corr_matrix[-1, :-1]  # 目標與所有特徵的相關性
         
-        # 將特徵名稱和相關性組合並排序
-        corr_pairs = list(zip(feature_names, target_corr))
-        corr_pairs.sort(key=lambda x: abs(x[1]), reverse=True)
-        
-        # 分離排序後的名稱和相關性
-        sorted_names = [pair[0] for pair in corr_pairs]
-        sorted_corrs = [pair[1] for pair in corr_pairs]
-        
-        # 取前20個相關性最強的特徵
-        if len(sorted_names) > 20:
-            sorted_names = sorted_names[:20]
-            sorted_corrs = sorted_corrs[:20]
+        # 按相關性絕對值降序取前20個相關性最強的特徵（穩定排序保持並列特徵的原始順序）
+        top_idx = np.argsort(-np.abs(target_corr), kind='stable')[:20]
+        sorted_corrs = target_corr[top_idx]
+        sorted_names = [feature_names[i] for i in top_idx]
         
         # 創建條形圖
-        plt.figure(figsize=(12, 8))
-        colors = plt.cm.RdBu_r(np.linspace(0, 1, len(sorted_corrs)))
-        bars = plt.barh(sorted_names, sorted_corrs, alpha=0.7)
-        
-        # 為每個條形設置顏色
-        for i, bar in enumerate(bars):
-            bar.set_color(colors[i])
+        fig.clear()
+        fig.set_size_inches(12, 8)
+        ax = fig.add_subplot()
+        colors = self._colors('RdBu_r', len(sorted_corrs))
+        ax.barh(sorted_names, sorted_corrs, color=colors, alpha=0.7)
         
         # 添加垂直線（零相關性）
-        plt.axvline(x=0, color='k', linestyle='-', alpha=.3)
+        ax.axvline(x=0, color='k', linestyle='-', alpha=.3)
         
         # 設置標題和標籤
-        plt.title('特徵與目標分數的相關性')
-        plt.xlabel('相關係數')
+        ax.set_title('特徵與目標分數的相關性')
+        ax.set_xlabel('相關係數')
         
         # 保存第二張圖
         base_name, ext = os.path.splitext(output_path)
         second_output = f"{base_name}_target_corr{ext}"
-        plt.tight_layout()
-        plt.savefig(second_output, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
+        fig.savefig(second_output, dpi=self.dpi)
+        plt.close(fig)
         
         return output_path, second_output
 